@@ -0,0 +1,63 @@
+"""Посты, группы и авторы в виде словарей для JSON.
+
+Поля поста — функции от объекта из Post.objects.feed(): они читают
+только загруженные им столбцы, поэтому сериализация не делает запросов.
+"""
+from django.urls import reverse
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'updated': lambda post: post.updated.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'url': lambda post: reverse('posts', kwargs={
+        'username': post.author.username, 'post_id': post.pk}),
+}
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(value):
+    """Поля из ?fields=id,text; без параметра — все."""
+    if not value:
+        return tuple(POST_FIELDS)
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in POST_FIELDS]
+    if unknown or not fields:
+        raise InvalidFields(', '.join(unknown))
+    return fields
+
+
+def serialize_post(post, fields):
+    return {field: POST_FIELDS[field](post) for field in fields}
+
+
+def post_state(post):
+    """То, от чего зависит сериализованный пост, — для ETag страницы."""
+    return [post.pk, post.updated.isoformat(), post.author.username,
+            post.group.slug if post.group_id else None]
+
+
+def serialize_group(group):
+    return {
+        'id': group.pk,
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+        'url': reverse('group', kwargs={'slug': group.slug}),
+    }
+
+
+def serialize_author(user, posts_count):
+    return {
+        'username': user.username,
+        'full_name': user.get_full_name(),
+        'posts_count': posts_count,
+        'url': reverse('profile', kwargs={'username': user.username}),
+    }
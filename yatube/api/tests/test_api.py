@@ -0,0 +1,150 @@
+import gzip
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import lookups
+from posts.cache import cache
+from posts.models import Group, Post, User
+
+
+def read_json(response):
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return json.loads(content.decode())
+
+
+@override_settings(API_PAGE_SIZE=2)
+class PostsApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='StasBasov', first_name='Стас', last_name='Басов')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        lookups.clear()
+
+    def test_feed_is_paginated_by_cursor(self):
+        response = self.client.get(reverse('api:posts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertTrue(response.streaming)
+        ids = []
+        url = reverse('api:posts')
+        while url:
+            data = read_json(self.client.get(url))
+            ids += [post['id'] for post in data['results']]
+            url = data['next']
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_previous_link(self):
+        first = read_json(self.client.get(reverse('api:posts')))
+        second = read_json(self.client.get(first['next']))
+        self.assertEqual(read_json(self.client.get(second['previous'])),
+                         first)
+
+    def test_post_fields(self):
+        post = self.posts[1]
+        data = read_json(self.client.get(
+            reverse('api:post', kwargs={'post_id': post.id})))
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['author'], 'StasBasov')
+        self.assertEqual(data['group'], 'test-slug')
+        self.assertIsNone(data['image'])
+        self.assertEqual(data['url'], reverse('posts', kwargs={
+            'username': 'StasBasov', 'post_id': post.id}))
+
+    def test_sparse_fieldset(self):
+        data = read_json(self.client.get(reverse('api:posts'),
+                                         {'fields': 'id,text'}))
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[-1].id, 'text': self.posts[-1].text})
+        self.assertIn('fields=id%2Ctext', data['next'])
+
+    def test_bad_parameters(self):
+        for params in ({'fields': 'id,password'}, {'limit': '0'},
+                       {'limit': 'много'}, {'cursor': 'garbage'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('api:posts'), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('detail', response.json())
+
+    def test_not_found_is_json(self):
+        response = self.client.get(
+            reverse('api:group', kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено.'})
+
+    def test_only_safe_methods(self):
+        response = self.client.post(reverse('api:posts'))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, HEAD')
+
+    def test_group_and_author(self):
+        data = read_json(self.client.get(
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'}),
+            {'limit': 10}))
+        self.assertEqual([post['id'] for post in data['results']],
+                         [self.posts[3].id, self.posts[1].id])
+        data = read_json(self.client.get(
+            reverse('api:author', kwargs={'username': 'StasBasov'})))
+        self.assertEqual(data['posts_count'], 5)
+        self.assertEqual(data['full_name'], 'Стас Басов')
+        data = read_json(self.client.get(reverse('api:groups')))
+        self.assertEqual(data['results'][0]['slug'], 'test-slug')
+
+    def test_feed_query_count(self):
+        url = reverse('api:author_posts', kwargs={'username': 'StasBasov'})
+        self.client.get(url)
+        # Автор берётся из кэша поиска, посты с авторами — одним запросом.
+        with self.assertNumQueries(1):
+            read_json(self.client.get(url, {'limit': 5}))
+
+    def test_etag_not_modified(self):
+        url = reverse('api:posts')
+        response = self.client.get(url)
+        etag = response['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+        post = Post.objects.get(pk=self.posts[-1].pk)
+        post.text = 'Правка'
+        post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_fields(self):
+        url = reverse('api:posts')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, {'fields': 'id'},
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_gzip(self):
+        response = self.client.get(reverse('api:posts'), {'limit': 5},
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(len(read_json(response)['results']), 5)
+        etag = response['ETag']
+        response = self.client.get(reverse('api:posts'), {'limit': 5},
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts, name='posts'),
+    path('posts/<int:post_id>/', views.post, name='post'),
+    path('groups/', views.groups, name='groups'),
+    path('groups/<slug>/', views.group, name='group'),
+    path('groups/<slug>/posts/', views.group_posts, name='group_posts'),
+    path('authors/<str:username>/', views.author, name='author'),
+    path('authors/<str:username>/posts/', views.author_posts,
+         name='author_posts'),
+]
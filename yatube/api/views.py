@@ -0,0 +1,181 @@
+"""JSON API для чтения постов, групп и авторов.
+
+Ленты отдаются страницами по курсору из тех же querysets, что и
+HTML-страницы. ETag страницы считается по id, времени правки, автору
+и группе постов, поэтому на совпавший If-None-Match ответ 304 уходит
+без сериализации, а тело страницы пишется по частям и сжимается gzip.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.gzip import gzip_page
+
+from posts.lookups import get_group_or_404, get_user_or_404
+from posts.models import AuthorStats, Group, Post
+from posts.paginators import InvalidCursor, KeysetPaginator
+
+from .serializers import (InvalidFields, parse_fields, post_state,
+                          serialize_author, serialize_group, serialize_post)
+
+JSON = 'application/json'
+
+
+class BadRequest(Exception):
+    pass
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def api_view(view):
+    """Только GET и HEAD, ошибки — JSON, ответ сжимается gzip."""
+    @gzip_page
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = error(405, 'Метод не поддерживается.')
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            response = view(request, *args, **kwargs)
+        except Http404:
+            return error(404, 'Не найдено.')
+        except BadRequest as exc:
+            return error(400, str(exc))
+        # Клиент хранит ответ, но сверяет его по ETag перед каждым показом.
+        patch_cache_control(response, no_cache=True)
+        return response
+    return wrapper
+
+
+def make_etag(state):
+    raw = json.dumps(state, ensure_ascii=False).encode()
+    return quote_etag(hashlib.md5(raw).hexdigest())
+
+
+def not_modified(request, etag):
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def json_response(request, data):
+    """Небольшой объект целиком; ETag — хэш тела."""
+    body = json.dumps(data, ensure_ascii=False)
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    response = not_modified(request, etag)
+    if response is None:
+        response = HttpResponse(body, content_type=JSON)
+        response['ETag'] = etag
+    return response
+
+
+def requested_fields(request):
+    try:
+        return parse_fields(request.GET.get('fields'))
+    except InvalidFields as exc:
+        raise BadRequest(f'Неизвестные поля: {exc}')
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        size = 0
+    if not 1 <= size <= settings.API_MAX_PAGE_SIZE:
+        raise BadRequest(
+            f'limit — число от 1 до {settings.API_MAX_PAGE_SIZE}.')
+    return size
+
+
+def page_link(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def stream_page(posts, fields, links):
+    yield '{"results": ['
+    for number, post in enumerate(posts):
+        data = json.dumps(serialize_post(post, fields), ensure_ascii=False)
+        yield f',{data}' if number else data
+    yield f'], "next": {json.dumps(links[0])}, ' \
+          f'"previous": {json.dumps(links[1])}}}'
+
+
+def feed_response(request, queryset):
+    """Страница ленты по курсору ?cursor= с полями ?fields=."""
+    fields = requested_fields(request)
+    paginator = KeysetPaginator(queryset, page_size(request))
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise BadRequest('Неверный курсор.')
+    posts = list(page)
+    links = (page_link(request, page.next_cursor),
+             page_link(request, page.previous_cursor))
+    etag = make_etag([fields, links, [post_state(post) for post in posts]])
+    response = not_modified(request, etag)
+    if response is None:
+        response = StreamingHttpResponse(
+            stream_page(posts, fields, links), content_type=JSON)
+        response['ETag'] = etag
+    return response
+
+
+@api_view
+def posts(request):
+    return feed_response(request, Post.objects.feed())
+
+
+@api_view
+def post(request, post_id):
+    post = get_object_or_404(Post.objects.feed(), pk=post_id)
+    return json_response(request,
+                         serialize_post(post, requested_fields(request)))
+
+
+@api_view
+def groups(request):
+    return json_response(request, {'results': [
+        serialize_group(group) for group in Group.objects.order_by('slug')
+    ]})
+
+
+@api_view
+def group(request, slug):
+    return json_response(request, serialize_group(get_group_or_404(slug)))
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_group_or_404(slug)
+    return feed_response(request, group.posts.feed())
+
+
+@api_view
+def author(request, username):
+    user = get_user_or_404(username)
+    return json_response(request, serialize_author(
+        user, AuthorStats.objects.posts_count(user)))
+
+
+@api_view
+def author_posts(request, username):
+    user = get_user_or_404(username)
+    return feed_response(request, user.posts.feed())
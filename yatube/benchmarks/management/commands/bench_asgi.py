@@ -0,0 +1,142 @@
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from benchmarks.seed import seed
+from posts.cache import isolated_caches
+from posts.models import Group, Post, User
+from yatube.asgi import BufferedWsgiToAsgi
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность WSGI и ASGI на лентах при '
+            'медленных клиентах. Данные живут во временной базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--clients', type=int, default=100,
+                            help='Сколько клиентов ждут ответа разом.')
+        parser.add_argument('--workers', type=int, default=8,
+                            help='Потоков у WSGI-сервера и у пула ASGI.')
+        parser.add_argument('--client-delay', type=float, default=200,
+                            help='Сколько мс клиент принимает ответ.')
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['clients'],
+               options['workers']) < 1:
+            raise CommandError('Числа запросов, клиентов и потоков > 0.')
+        old_name = connection.settings_dict['NAME']
+        with tempfile.TemporaryDirectory() as directory:
+            connection.settings_dict['TEST']['NAME'] = os.path.join(
+                directory, 'bench.sqlite3')
+            connection.creation.create_test_db(verbosity=0,
+                                               autoclobber=True,
+                                               serialize=False)
+            try:
+                with override_settings(DATABASE_REPLICAS=[]), \
+                        isolated_caches():
+                    results = self.bench(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        for name, rps in results.items():
+            self.stdout.write(f'{name:5} запросов/с {rps:8.1f}')
+
+    def bench(self, options):
+        seed(10, 3, options['posts'])
+        author = User.objects.create_user(username='bench_asgi')
+        post = Post.objects.create(author=author, text='Пост для замеров')
+        client = Client()
+        client.force_login(author)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={cookie}'
+        group = Group.objects.first()
+        urls = itertools.cycle([
+            reverse('index'),
+            reverse('group', kwargs={'slug': group.slug}),
+            reverse('profile', kwargs={'username': author.username}),
+            reverse('posts', kwargs={'username': author.username,
+                                     'post_id': post.id}),
+        ])
+        paths = [next(urls) for _ in range(options['requests'])]
+        self.delay = options['client_delay'] / 1000
+        application = WSGIHandler()
+        return {
+            'wsgi': self.run_wsgi(application, paths, options['workers']),
+            'asgi': self.run_asgi(application, paths, options['workers'],
+                                  options['clients']),
+        }
+
+    def run_wsgi(self, application, paths, workers):
+        def request(path):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_COOKIE': self.cookie,
+                'wsgi.input': BytesIO(),
+                'wsgi.errors': BytesIO(),
+                'wsgi.url_scheme': 'http',
+            }
+            response = application(environ, lambda status, headers: None)
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            # Синхронный сервер держит поток, пока клиент принимает ответ.
+            time.sleep(self.delay)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(request, paths))
+        return len(paths) / (time.perf_counter() - started)
+
+    def run_asgi(self, application, paths, workers, clients):
+        app = BufferedWsgiToAsgi(application)
+        cookie = self.cookie.encode()
+        delay = self.delay
+
+        async def request(path, limit):
+            async with limit:
+                scope = {
+                    'type': 'http',
+                    'http_version': '1.1',
+                    'method': 'GET',
+                    'path': path,
+                    'query_string': b'',
+                    'headers': [(b'host', b'localhost'),
+                                (b'cookie', cookie)],
+                }
+
+                async def receive():
+                    return {'type': 'http.request', 'body': b''}
+
+                async def send(message):
+                    if message['type'] == 'http.response.body':
+                        await asyncio.sleep(delay)
+
+                await app(scope, receive, send)
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(workers))
+            limit = asyncio.Semaphore(clients)
+            await asyncio.gather(*(request(path, limit) for path in paths))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        return len(paths) / (time.perf_counter() - started)
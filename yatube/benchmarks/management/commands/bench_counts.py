@@ -0,0 +1,110 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks import runner
+from benchmarks.seed import seed
+from posts.cache import (GroupFeed, cache, count_posts, feed_count,
+                         invalidate_feed_counts, invalidate_group_feeds,
+                         isolated_caches)
+from posts.models import AuthorStats, Group, Post, User
+
+
+class Rollback(Exception):
+    pass
+
+
+def timed(function, repeat, before=None):
+    """Медиана времени function() в мс; before() вызывается перед каждым
+    замером и в него не входит."""
+    timings = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает точный COUNT с числом постов из кэша, счётчиков '
+            'и статистики базы — отдельно и в задержке главной. '
+            'Данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля.')
+        try:
+            with isolated_caches(), transaction.atomic():
+                seed(10, 3, options['posts'])
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Post._meta.db_table}')
+                counts = self.measure_counts(options['repeat'])
+                pages = self.measure_index(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(f"{'лента':8} {'COUNT мс':>10} {'промах мс':>10} "
+                          f"{'кэш мс':>10}")
+        for scope, (exact, miss, cached) in counts.items():
+            self.stdout.write(
+                f'{scope:8} {exact:10.3f} {miss:10.3f} {cached:10.3f}')
+        for name, result in pages.items():
+            self.stdout.write(
+                f"главная, {name:13} p50 {result['p50_ms']:9.3f} мс  "
+                f"запросов {result['queries']}")
+
+    def measure_counts(self, repeat):
+        group = Group.objects.filter(
+            slug__startswith='bench-group-').order_by('id').first()
+        author = User.objects.filter(
+            username__startswith='bench_user_').order_by('id').first()
+        index = Post.objects.feed()
+        return {
+            'index': (
+                timed(index.count, repeat),
+                timed(lambda: count_posts(index), repeat),
+                timed(lambda: feed_count('index', index), repeat),
+            ),
+            'group': (
+                timed(group.posts.count, repeat),
+                timed(lambda: GroupFeed(group).count(), repeat,
+                      before=lambda: invalidate_group_feeds(group.id)),
+                timed(lambda: GroupFeed(group).count(), repeat),
+            ),
+            # Для автора счётчик — таблица AuthorStats, кэша нет.
+            'author': (
+                timed(author.posts.count, repeat),
+                timed(lambda: AuthorStats.objects.posts_count(author),
+                      repeat),
+                timed(lambda: AuthorStats.objects.posts_count(author),
+                      repeat),
+            ),
+        }
+
+    def measure_index(self, repeat):
+        author = User.objects.filter(
+            username__startswith='bench_user_').order_by('id').first()
+        client = Client()
+        client.force_login(author)
+        url = reverse('index')
+        cache.clear()
+        client.get(url)
+
+        def cold():
+            invalidate_feed_counts('index')
+            return client.get(url)
+
+        return {
+            'число заново': runner.measure(cold, repeat),
+            'число из кэша': runner.measure(lambda: client.get(url), repeat),
+        }
@@ -0,0 +1,78 @@
+import tempfile
+import time
+
+from django.core.mail import get_connection, send_mail
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+
+from mail.delivery import flush
+from mail.smtp import SMTPSink
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает, сколько писем в секунду отправляют текущий '
+            'файловый бэкенд, SMTP по письму на соединение и очередь '
+            'с пакетной отправкой. Очередь откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--connect-delay', type=float, default=20,
+                            help='Сколько мс SMTP-сервер отвечает на '
+                                 'новое соединение.')
+
+    def handle(self, *args, **options):
+        if min(options['messages'], options['batch_size']) < 1:
+            raise CommandError('Число писем и размер пачки > 0.')
+        count = options['messages']
+        sink = SMTPSink(connect_delay=options['connect_delay'] / 1000)
+        with sink, tempfile.TemporaryDirectory() as directory, \
+                override_settings(EMAIL_HOST='localhost',
+                                  EMAIL_PORT=sink.port,
+                                  EMAIL_FILE_PATH=directory,
+                                  TASKS_EAGER=False):
+            results = {
+                'file': self.send_each(
+                    'django.core.mail.backends.filebased.EmailBackend',
+                    count),
+                'smtp': self.send_each(
+                    'django.core.mail.backends.smtp.EmailBackend', count),
+            }
+            connections = sink.stats['connections']
+            try:
+                with transaction.atomic():
+                    results['queue'] = self.send_each(
+                        'mail.backends.QueuedEmailBackend', count)
+                    results['flush'] = self.flush(count,
+                                                  options['batch_size'])
+                    raise Rollback
+            except Rollback:
+                pass
+            flush_connections = sink.stats['connections'] - connections
+        for name, rate in results.items():
+            self.stdout.write(f'{name:5} писем/с {rate:9.1f}')
+        self.stdout.write(
+            f'SMTP-соединений на {count} писем: по письму {connections}, '
+            f'из очереди {flush_connections}')
+
+    def send_each(self, backend, count):
+        """Как сейчас в запросе: send_mail на каждое письмо."""
+        started = time.perf_counter()
+        for number in range(count):
+            send_mail(f'Письмо {number}', 'Текст письма',
+                      'noreply@yatube.local', [f'user{number}@example.com'],
+                      connection=get_connection(backend))
+        return count / (time.perf_counter() - started)
+
+    def flush(self, count, batch_size):
+        started = time.perf_counter()
+        sent, failed = flush(batch_size, get_connection(
+            'django.core.mail.backends.smtp.EmailBackend'))
+        if sent != count:
+            raise CommandError(f'Отправлено {sent} из {count} писем.')
+        return count / (time.perf_counter() - started)
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from posts.models import Post, User
+
+PROFILES = ('default', 'tuned')
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность чтения ленты, пока '
+            'в базу пишутся посты: SQLite без настроек и с SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Длительность замера в секундах.')
+        parser.add_argument('--posts', type=int, default=2000,
+                            help='Сколько постов создать до замера.')
+        parser.add_argument('--profile', choices=PROFILES, nargs='+',
+                            default=list(PROFILES))
+
+    def handle(self, *args, **options):
+        if options['readers'] < 1 or options['duration'] <= 0:
+            raise CommandError('Нужен хотя бы один читатель и время > 0.')
+        for profile in options['profile']:
+            with tempfile.TemporaryDirectory() as directory:
+                alias = f'bench_{profile}'
+                connections.databases[alias] = {
+                    'ENGINE': 'yatube.sqlite',
+                    'NAME': os.path.join(directory, 'bench.sqlite3'),
+                    'OPTIONS': {
+                        'pragmas': (settings.SQLITE_PRAGMAS
+                                    if profile == 'tuned' else {}),
+                    },
+                }
+                try:
+                    result = self.bench(alias, options)
+                finally:
+                    connections[alias].close()
+                    del connections.databases[alias]
+            self.stdout.write(
+                f"{profile:8} чтений/с {result['reads']:9.1f}  "
+                f"записей/с {result['writes']:8.1f}  "
+                f"ошибок блокировки {result['locked']}")
+
+    def bench(self, alias, options):
+        call_command('migrate', database=alias, verbosity=0)
+        author = User.objects.db_manager(alias).create_user(
+            username='bench_sqlite')
+        Post.objects.using(alias).bulk_create(
+            (Post(author=author, text=f'Пост {i}')
+             for i in range(options['posts'])), batch_size=500)
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def run(operation, counter):
+            done = locked = 0
+            try:
+                while not stop.is_set():
+                    try:
+                        operation()
+                        done += 1
+                    except OperationalError:
+                        locked += 1
+            finally:
+                connections[alias].close()
+                with lock:
+                    counts[counter] += done
+                    counts['locked'] += locked
+
+        def read():
+            list(Post.objects.using(alias).feed()[:10])
+
+        def write():
+            with transaction.atomic(using=alias):
+                Post.objects.using(alias).bulk_create(
+                    [Post(author_id=author.id, text='Новый пост')])
+
+        threads = [
+            threading.Thread(target=run, args=(read, 'reads'))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=run, args=(write, 'writes'))
+            for _ in range(options['writers'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'reads': counts['reads'] / elapsed,
+            'writes': counts['writes'] / elapsed,
+            'locked': counts['locked'],
+        }
@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.seed import seed
+from posts import lookups
+from posts.cache import isolated_caches
+from posts.models import Group, Post, User
+from yatube.metrics import registry
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Отрисовывает основные страницы и печатает время шаблонов: '
+            'полное, собственное и самые дорогие включения. '
+            'Данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--includes', type=int, default=3,
+                            help='Сколько включений показать у шаблона.')
+        parser.add_argument('--warm', action='store_true',
+                            help='Не сбрасывать кэш между запросами: '
+                                 'карточки и страницы берутся из него.')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля.')
+        registry.reset()
+        try:
+            with isolated_caches(), transaction.atomic():
+                seed(10, 3, options['posts'])
+                self.render_pages(options['repeat'], options['warm'])
+                raise Rollback
+        except Rollback:
+            pass
+        templates = registry.snapshot()['templates']
+        registry.reset()
+        if not templates:
+            # Время шаблонов снимает MetricsMiddleware: без него в
+            # MIDDLEWARE печатать нечего.
+            raise CommandError('Время шаблонов не записано: '
+                               'нет yatube.metrics.MetricsMiddleware.')
+        self.stdout.write(f"{'шаблон':32} {'раз':>5} {'всего мс':>10} "
+                          f"{'своё мс':>10} {'среднее':>9}")
+        for name, stats in templates.items():
+            self.stdout.write(
+                f"{name:32} {stats['count']:5} {stats['total_ms']:10.1f} "
+                f"{stats['self_ms']:10.1f} {stats['mean_ms']:9.3f}")
+            for include in stats['includes'][:options['includes']]:
+                self.stdout.write(
+                    f"  └ {include['template']:28} {include['count']:5} "
+                    f"{include['total_ms']:10.1f}")
+
+    def render_pages(self, repeat, warm):
+        author = User.objects.filter(
+            username__startswith='bench_user_').order_by('id').first()
+        group = Group.objects.filter(
+            slug__startswith='bench-group-').order_by('id').first()
+        post = Post.objects.filter(author=author).order_by('-id').first()
+        urls = [
+            reverse('index'),
+            reverse('group', kwargs={'slug': group.slug}),
+            reverse('profile', kwargs={'username': author.username}),
+            reverse('posts', kwargs={'username': author.username,
+                                     'post_id': post.id}),
+        ]
+        client = Client()
+        client.force_login(author)
+        for _ in range(repeat):
+            if not warm:
+                for cache in caches.all():
+                    cache.clear()
+                lookups.clear()
+            for url in urls:
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'{url}: ответ {response.status_code}')
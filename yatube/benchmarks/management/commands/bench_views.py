@@ -0,0 +1,111 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from benchmarks import runner
+from benchmarks.seed import seed
+from posts.cache import isolated_caches
+from posts.models import Group, Post, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Наполняет базу, замеряет представления posts и сохраняет '
+            'p50/p95 и число запросов в JSON. Данные откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=30,
+                            help='Сколько раз запросить каждую страницу.')
+        parser.add_argument('--output', default='bench_views.json',
+                            help='Куда записать результаты.')
+        parser.add_argument('--baseline',
+                            help='JSON прошлого прогона для сравнения.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимый рост p95, доля (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat должен быть больше нуля.')
+        baseline = None
+        if options['baseline']:
+            if not os.path.exists(options['baseline']):
+                raise CommandError(f"Нет файла {options['baseline']}")
+            baseline = runner.load(options['baseline'])
+        try:
+            # Данные живут в незакоммиченной транзакции основной базы:
+            # реплики их не видят, поэтому страницы читают только с неё,
+            # а кэши временные, чтобы откаченные строки в них не остались.
+            with override_settings(DATABASE_REPLICAS=[]), \
+                    isolated_caches(), transaction.atomic():
+                started = time.perf_counter()
+                seed(options['users'], options['groups'], options['posts'])
+                seeded = time.perf_counter() - started
+                views = self.run_views(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+        results = {
+            'volumes': {
+                'users': options['users'],
+                'groups': options['groups'],
+                'posts': options['posts'],
+            },
+            'seed_s': round(seeded, 3),
+            'views': views,
+        }
+        runner.dump(results, options['output'])
+        for view, result in views.items():
+            self.stdout.write(
+                f"{view:12} p50 {result['p50_ms']:9.3f} мс  "
+                f"p95 {result['p95_ms']:9.3f} мс  "
+                f"запросов {result['queries']}")
+        if baseline is None:
+            return
+        regressions = runner.compare(results, baseline, options['threshold'])
+        if regressions:
+            raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
+
+    def run_views(self, repeat):
+        group = Group.objects.filter(
+            slug__startswith='bench-group-').order_by('id').first()
+        author = User.objects.filter(
+            username__startswith='bench_user_').order_by('id').first()
+        if group is None or author is None:
+            raise CommandError('Нужны хотя бы один автор и одна группа.')
+        post = Post.objects.create(author=author, group=group,
+                                   text='Пост для замеров')
+        client = Client()
+        client.force_login(author)
+        post_url = reverse('posts', kwargs={
+            'username': author.username, 'post_id': post.id})
+        edit_url = reverse('post_edit', kwargs={
+            'username': author.username, 'post_id': post.id})
+        edits = iter(range(repeat))
+        requests = {
+            'index': lambda: client.get(reverse('index')),
+            'group_posts': lambda: client.get(
+                reverse('group', kwargs={'slug': group.slug})),
+            'profile': lambda: client.get(
+                reverse('profile', kwargs={'username': author.username})),
+            'post_view': lambda: client.get(post_url),
+            'new_post': lambda: client.post(
+                reverse('new_post'), {'text': 'Новый пост'}),
+            'post_edit': lambda: client.post(
+                edit_url, {'text': f'Правка {next(edits)}',
+                           'group': group.id}),
+        }
+        return {
+            view: runner.measure(request, repeat)
+            for view, request in requests.items()
+        }
@@ -0,0 +1,67 @@
+"""Замеры представлений через тестовый клиент и сравнение с эталоном."""
+import json
+import statistics
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу: значение, не меньше которого
+    оказалась доля fraction всех замеров."""
+    ordered = sorted(values)
+    rank = max(int(round(fraction * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def measure(request, repeat):
+    """Выполняет request() repeat раз и сводит задержку и число запросов."""
+    timings = []
+    queries = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Ответ {response.status_code}')
+        queries.append(len(captured))
+    return {
+        'p50_ms': round(percentile(timings, 0.5), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Возвращает описания регрессий: p95 вырос больше чем
+    на threshold (долю) или запросов стало больше."""
+    regressions = []
+    for view, current in results['views'].items():
+        previous = baseline.get('views', {}).get(view)
+        if previous is None:
+            continue
+        limit = previous['p95_ms'] * (1 + threshold)
+        if current['p95_ms'] > limit:
+            regressions.append(
+                f"{view}: p95 {current['p95_ms']} мс "
+                f"против {previous['p95_ms']} мс")
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f"{view}: {current['queries']} запросов "
+                f"против {previous['queries']}")
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def dump(results, path):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(results, stream, ensure_ascii=False, indent=2)
+        stream.write('\n')
@@ -0,0 +1,52 @@
+import datetime as dt
+import itertools
+import random
+
+from django.db import transaction
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from posts.models import AuthorStats, Group, Post, User
+from posts.transfer import bulk_create_posts
+
+mixer = Mixer(commit=False)
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def seed(users, groups, posts, batch_size=1000, rng=None):
+    """Наполняет базу пользователями, группами и постами.
+
+    Объекты собирает mixer, в базу они уходят через bulk_create, а даты
+    постов равномерно растянуты на год назад от текущего момента.
+    """
+    rng = rng or random.Random(0)
+    with transaction.atomic():
+        User.objects.bulk_create(mixer.cycle(users).blend(
+            User, username=mixer.sequence('bench_user_{0}')))
+        Group.objects.bulk_create(mixer.cycle(groups).blend(
+            Group, slug=mixer.sequence('bench-group-{0}')))
+    author_ids = list(User.objects.filter(
+        username__startswith='bench_user_').values_list('id', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-').values_list('id', flat=True))
+    now = timezone.now()
+    step = dt.timedelta(days=365) / max(posts, 1)
+    for start, batch in enumerate(chunks(range(posts), batch_size)):
+        objs = mixer.cycle(len(batch)).blend(
+            Post,
+            author_id=(rng.choice(author_ids) for _ in batch),
+            group_id=(rng.choice(group_ids + [None]) for _ in batch),
+            pub_date=(now - step * (posts - i) for i in batch),
+            # Иначе mixer сохранит в MEDIA_ROOT картинку на каждый пост.
+            image='',
+        )
+        bulk_create_posts(objs)
+    AuthorStats.objects.recount(User.objects.filter(id__in=author_ids))
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.template.base import Template
+from django.test import TestCase, modify_settings
+from django.test.utils import instrumented_test_render
+
+from posts.cache import cache, feed_count_key
+from posts.models import Post
+
+from ..runner import compare, percentile
+
+VIEWS = ('index', 'group_posts', 'profile', 'post_view', 'new_post',
+         'post_edit')
+
+
+class BenchViewsCommandTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = os.path.join(directory.name, 'bench.json')
+
+    def bench(self, **options):
+        call_command('bench_views', users=3, groups=2, posts=30, repeat=2,
+                     output=self.output, stdout=StringIO(), **options)
+        with open(self.output, encoding='utf-8') as stream:
+            return json.load(stream)
+
+    def test_results_cover_all_views(self):
+        results = self.bench()
+        self.assertEqual(set(results['views']), set(VIEWS))
+        for result in results['views'].values():
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['queries'], 0)
+
+    def test_seeded_data_is_rolled_back(self):
+        self.bench()
+        self.assertFalse(Post.objects.exists())
+
+    def test_live_caches_are_untouched(self):
+        cache.clear()
+        cache.set('sentinel', 'живой')
+        self.addCleanup(cache.clear)
+        self.bench()
+        self.assertEqual(cache.get('sentinel'), 'живой')
+        self.assertIsNone(cache.get(feed_count_key('index')))
+
+    def test_regression_against_baseline_fails(self):
+        baseline = os.path.join(os.path.dirname(self.output), 'base.json')
+        with open(baseline, 'w', encoding='utf-8') as stream:
+            json.dump({'views': {
+                'index': {'p95_ms': 0.0001, 'queries': 1}}}, stream)
+        with self.assertRaisesMessage(CommandError, 'index'):
+            self.bench(baseline=baseline)
+
+
+class RunnerTest(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_compare_within_threshold(self):
+        baseline = {'views': {'index': {'p95_ms': 10, 'queries': 4}}}
+        results = {'views': {'index': {'p95_ms': 11.5, 'queries': 4}}}
+        self.assertEqual(compare(results, baseline, 0.2), [])
+        results['views']['index']['p95_ms'] = 12.5
+        self.assertEqual(len(compare(results, baseline, 0.2)), 1)
+
+
+class BenchSQLiteCommandTest(TestCase):
+    def test_reports_throughput_per_profile(self):
+        out = StringIO()
+        call_command('bench_sqlite', posts=20, duration=0.2, readers=2,
+                     profile=['tuned'], stdout=out)
+        self.assertIn('tuned', out.getvalue())
+        self.assertIn('чтений/с', out.getvalue())
+
+
+class BenchTemplatesCommandTest(TestCase):
+    def test_reports_templates_and_includes(self):
+        out = StringIO()
+        call_command('bench_templates', posts=20, repeat=1, stdout=out)
+        output = out.getvalue()
+        for name in ('misc/base.html', 'misc/nav.html',
+                     'misc/paginator.html', 'misc/post_card.html'):
+            self.assertIn(name, output)
+        self.assertIn('└ misc/nav.html', output)
+        self.assertFalse(Post.objects.exists())
+
+    def test_render_replaced_after_import_is_measured(self):
+        self.addCleanup(setattr, Template, '_render', Template._render)
+        Template._render = instrumented_test_render
+        out = StringIO()
+        call_command('bench_templates', posts=20, repeat=1, stdout=out)
+        self.assertIn('misc/base.html', out.getvalue())
+
+    @modify_settings(MIDDLEWARE={
+        'remove': 'yatube.metrics.MetricsMiddleware'})
+    def test_missing_middleware_is_reported(self):
+        with self.assertRaisesMessage(CommandError, 'MetricsMiddleware'):
+            call_command('bench_templates', posts=20, repeat=1,
+                         stdout=StringIO())
+
+
+class BenchCountsCommandTest(TestCase):
+    def test_reports_counts_and_index_latency(self):
+        out = StringIO()
+        call_command('bench_counts', posts=30, repeat=2, stdout=out)
+        output = out.getvalue()
+        for scope in ('index', 'group', 'author', 'число из кэша'):
+            self.assertIn(scope, output)
+        self.assertFalse(Post.objects.exists())
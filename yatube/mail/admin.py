@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import QueuedEmail
+
+
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients', 'status', 'created')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients', 'last_error')
+    exclude = ('message',)
+
+
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
@@ -0,0 +1,137 @@
+"""Отправка очереди писем пачками через одно соединение.
+
+Бэкенд QueuedEmailBackend только записывает письма в таблицу, а задача
+mail.jobs.flush_mail открывает соединение MAIL_DELIVERY_BACKEND один
+раз и отправляет через него всю очередь по MAIL_BATCH_SIZE писем.
+"""
+import logging
+import pickle
+import smtplib
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.utils import timezone
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+# Отказы, которые касаются одного письма: повторять его бессмысленно,
+# а соединение остаётся рабочим. Остальные ошибки прерывают отправку.
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused,
+                  smtplib.SMTPDataError)
+
+
+class DeliveryStats:
+    """Счётчики отправки в этом процессе: письма, пачки и время."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.batches = 0
+            self.sent = 0
+            self.failed = 0
+            self.seconds = 0
+
+    def record(self, sent, failed, seconds):
+        with self._lock:
+            self.batches += 1
+            self.sent += sent
+            self.failed += failed
+            self.seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'sent': self.sent,
+                'failed': self.failed,
+                'seconds': round(self.seconds, 3),
+                'messages_per_second': round(
+                    self.sent / self.seconds, 1) if self.seconds else None,
+            }
+
+
+stats = DeliveryStats()
+
+
+def release_stale():
+    """Возвращает в очередь письма, отправитель которых пропал."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASKS_LOCK_TIMEOUT)
+    return QueuedEmail.objects.filter(
+        status=QueuedEmail.SENDING, locked_at__lt=deadline,
+    ).update(status=QueuedEmail.PENDING, batch=None, locked_at=None)
+
+
+def claim(limit):
+    """Забирает до limit писем под общей меткой пачки."""
+    ids = list(QueuedEmail.objects.filter(
+        status=QueuedEmail.PENDING,
+    ).order_by('id').values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    batch = uuid.uuid4()
+    QueuedEmail.objects.filter(
+        id__in=ids, status=QueuedEmail.PENDING,
+    ).update(status=QueuedEmail.SENDING, batch=batch,
+             locked_at=timezone.now())
+    return list(QueuedEmail.objects.filter(batch=batch).order_by('id'))
+
+
+def send_batch(connection, emails):
+    """Отправляет пачку; возвращает (отправлено, отклонено)."""
+    started = time.perf_counter()
+    sent = []
+    failed = 0
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([pickle.loads(email.message)])
+            except MESSAGE_ERRORS as error:
+                QueuedEmail.objects.filter(id=email.id).update(
+                    status=QueuedEmail.FAILED, last_error=repr(error),
+                    batch=None, locked_at=None)
+                failed += 1
+            else:
+                sent.append(email.id)
+    except Exception:
+        # Соединение потеряно: неотправленное ждёт следующей попытки.
+        QueuedEmail.objects.filter(
+            batch=emails[0].batch, status=QueuedEmail.SENDING,
+        ).exclude(id__in=sent).update(
+            status=QueuedEmail.PENDING, batch=None, locked_at=None)
+        raise
+    finally:
+        QueuedEmail.objects.filter(id__in=sent).delete()
+    seconds = time.perf_counter() - started
+    stats.record(len(sent), failed, seconds)
+    logger.info('Отправлено писем: %d, отклонено: %d, %.1f писем/с',
+                len(sent), failed, len(sent) / seconds if seconds else 0)
+    return len(sent), failed
+
+
+def flush(batch_size=None, connection=None):
+    """Отправляет всю очередь; возвращает (отправлено, отклонено)."""
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    release_stale()
+    if connection is None:
+        connection = get_connection(settings.MAIL_DELIVERY_BACKEND)
+    sent = failed = 0
+    emails = claim(batch_size)
+    if not emails:
+        return sent, failed
+    with connection:
+        while emails:
+            batch_sent, batch_failed = send_batch(connection, emails)
+            sent += batch_sent
+            failed += batch_failed
+            emails = claim(batch_size)
+    return sent, failed
@@ -0,0 +1,25 @@
+"""Фоновые задачи почты (см. tasks.queue)."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from tasks.models import Job
+from tasks.queue import enqueue, task
+
+from .delivery import flush
+
+
+@task
+def flush_mail():
+    flush()
+
+
+def schedule_flush():
+    """Ставит отправку очереди через MAIL_FLUSH_DELAY секунд, если она
+    ещё не стоит: письма за это время уйдут одной пачкой."""
+    if not settings.TASKS_EAGER and Job.objects.filter(
+            name=flush_mail.task_name, status=Job.PENDING).exists():
+        return
+    enqueue(flush_mail.task_name, run_at=timezone.now() + timedelta(
+        seconds=settings.MAIL_FLUSH_DELAY))
@@ -0,0 +1,32 @@
+from email import message_from_bytes, policy
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from mail.smtp import SMTPSink
+
+
+class Command(BaseCommand):
+    help = ('Локальный SMTP-сервер для разработки: принимает письма '
+            'и печатает их заголовки, никуда не отправляя.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=settings.EMAIL_HOST)
+        parser.add_argument('--port', type=int, default=settings.EMAIL_PORT)
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['host'], options['port'],
+                        on_message=self.show)
+        self.stdout.write(f'SMTP на {options["host"]}:{sink.port}')
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.server_close()
+
+    def show(self, sender, recipients, data):
+        message = message_from_bytes(data, policy=policy.default)
+        self.stdout.write(
+            f"{message['Date']}  {sender} → {', '.join(recipients)}  "
+            f"{message['Subject']}")
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class QueuedEmail(models.Model):
+    """Письмо, которое ждёт отправки воркером.
+
+    message — EmailMessage в pickle: так сохраняются вложения
+    и альтернативные версии, и письмо уходит любым бэкендом Django.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    message = models.BinaryField()
+    subject = models.CharField('тема', max_length=255)
+    recipients = models.TextField('получатели')
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    batch = models.UUIDField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'],
+                         name='mail_queued_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
@@ -0,0 +1,120 @@
+"""Локальный SMTP-сервер, который принимает письма и никуда их не шлёт.
+
+Замена DebuggingServer из smtpd (модуль убран из Python 3.12) для
+разработки, тестов и замеров. Понимает ровно то, что нужно smtplib:
+EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP и QUIT.
+"""
+import socketserver
+import threading
+import time
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        server.count('connections')
+        if server.connect_delay:
+            # Рукопожатие с удалённым сервером: TCP, TLS, приветствие.
+            time.sleep(server.connect_delay)
+        self.reply('220 localhost yatube SMTP sink')
+        self.sender, self.recipients = None, []
+        for line in iter(self.rfile.readline, b''):
+            command = line.decode('ascii', 'replace').strip()
+            verb, argument = command[:4].upper(), command[4:]
+            method = getattr(self, f'smtp_{verb}', None)
+            if method is None:
+                self.reply('502 Command not implemented')
+            elif method(argument.partition(':')[2].strip()) is False:
+                return
+
+    def smtp_EHLO(self, argument):
+        self.reply('250-localhost')
+        self.reply('250 8BITMIME')
+
+    def smtp_HELO(self, argument):
+        self.reply('250 localhost')
+
+    def smtp_MAIL(self, argument):
+        self.sender, self.recipients = argument, []
+        self.reply('250 OK')
+
+    def smtp_RCPT(self, argument):
+        self.recipients.append(argument)
+        self.reply('250 OK')
+
+    def smtp_DATA(self, argument):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        self.server.receive(self.sender, self.recipients, self.read_data())
+        self.reply('250 OK')
+
+    def smtp_RSET(self, argument):
+        self.sender, self.recipients = None, []
+        self.reply('250 OK')
+
+    def smtp_NOOP(self, argument):
+        self.reply('250 OK')
+
+    def smtp_QUIT(self, argument):
+        self.reply('221 Bye')
+        return False
+
+    def read_data(self):
+        lines = []
+        for line in iter(self.rfile.readline, b''):
+            if line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """SMTP-сервер в фоновом потоке. Порт 0 — любой свободный.
+
+    on_message(sender, recipients, data) вызывается на каждое письмо;
+    keep=True сохраняет письма в messages.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='localhost', port=0, connect_delay=0,
+                 keep=False, on_message=None):
+        super().__init__((host, port), SMTPHandler)
+        self.connect_delay = connect_delay
+        self.keep = keep
+        self.on_message = on_message
+        self.messages = []
+        self.stats = {'connections': 0, 'messages': 0}
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def receive(self, sender, recipients, data):
+        self.count('messages')
+        if self.keep:
+            with self._lock:
+                self.messages.append((sender, recipients, data))
+        if self.on_message is not None:
+            self.on_message(sender, recipients, data)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,172 @@
+import os
+import smtplib
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import get_connection, send_mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import User
+from tasks.models import Job
+from tasks.queue import claim, run_job
+
+from ..delivery import flush, stats
+from ..jobs import flush_mail
+from ..models import QueuedEmail
+from ..smtp import SMTPSink
+
+QUEUED = 'mail.backends.QueuedEmailBackend'
+LOCMEM = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+class RefusingBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        for message in messages:
+            if 'refused@example.com' in message.to:
+                raise smtplib.SMTPRecipientsRefused({})
+            if 'down@example.com' in message.to:
+                raise smtplib.SMTPServerDisconnected('Сервер пропал')
+        return super().send_messages(messages)
+
+
+def queue_mail(*recipients):
+    for recipient in recipients:
+        send_mail('Тема', 'Текст', 'noreply@yatube.local', [recipient])
+
+
+@override_settings(EMAIL_BACKEND=QUEUED, MAIL_DELIVERY_BACKEND=LOCMEM,
+                   TASKS_EAGER=False, MAIL_FLUSH_DELAY=1)
+class QueuedEmailBackendTest(TestCase):
+    def setUp(self):
+        stats.reset()
+
+    def test_send_mail_only_enqueues(self):
+        queue_mail('a@example.com', 'b@example.com')
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(QueuedEmail.objects.count(), 2)
+        email = QueuedEmail.objects.first()
+        self.assertEqual(email.recipients, 'a@example.com')
+        self.assertEqual(email.status, QueuedEmail.PENDING)
+
+    def test_one_flush_job_for_many_messages(self):
+        started = timezone.now()
+        queue_mail('a@example.com', 'b@example.com', 'c@example.com')
+        job = Job.objects.get()
+        self.assertEqual(job.name, flush_mail.task_name)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=1))
+        Job.objects.update(run_at=timezone.now())
+        self.assertTrue(run_job(claim(10)[0]))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    def test_flush_sends_in_batches(self):
+        queue_mail(*[f'user{number}@example.com' for number in range(5)])
+        self.assertEqual(flush(batch_size=2), (5, 0))
+        self.assertEqual([message.to for message in mail.outbox],
+                         [[f'user{number}@example.com']
+                          for number in range(5)])
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['batches'], 3)
+        self.assertEqual(snapshot['sent'], 5)
+        self.assertGreater(snapshot['messages_per_second'], 0)
+
+    def test_flush_reuses_one_smtp_connection(self):
+        queue_mail(*[f'user{number}@example.com' for number in range(4)])
+        with SMTPSink(keep=True) as sink:
+            connection = get_connection(
+                'django.core.mail.backends.smtp.EmailBackend',
+                host='localhost', port=sink.port)
+            self.assertEqual(flush(2, connection), (4, 0))
+        self.assertEqual(sink.stats, {'connections': 1, 'messages': 4})
+        sender, recipients, data = sink.messages[0]
+        self.assertEqual(recipients, ['<user0@example.com>'])
+        self.assertIn(b'Subject:', data)
+
+    @override_settings(
+        MAIL_DELIVERY_BACKEND='mail.tests.test_mail.RefusingBackend')
+    def test_refused_message_is_marked_failed(self):
+        queue_mail('a@example.com', 'refused@example.com', 'b@example.com')
+        self.assertEqual(flush(), (2, 1))
+        failed = QueuedEmail.objects.get()
+        self.assertEqual(failed.status, QueuedEmail.FAILED)
+        self.assertIn('SMTPRecipientsRefused', failed.last_error)
+
+    @override_settings(
+        MAIL_DELIVERY_BACKEND='mail.tests.test_mail.RefusingBackend')
+    def test_lost_connection_returns_rest_to_queue(self):
+        queue_mail('a@example.com', 'down@example.com', 'b@example.com')
+        with self.assertRaises(smtplib.SMTPServerDisconnected):
+            flush()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            list(QueuedEmail.objects.values_list('recipients', 'status')),
+            [('down@example.com', QueuedEmail.PENDING),
+             ('b@example.com', QueuedEmail.PENDING)])
+
+    def test_signup_queues_welcome_email(self):
+        self.client.post(reverse('signup'), {
+            'username': 'new_user',
+            'email': 'new@example.com',
+            'password1': 'Sup3r-secret-pass',
+            'password2': 'Sup3r-secret-pass',
+        })
+        self.assertTrue(User.objects.filter(username='new_user').exists())
+        email = QueuedEmail.objects.get()
+        self.assertEqual(email.recipients, 'new@example.com')
+        self.assertIn('new_user', email.subject)
+        flush()
+        self.assertIn('/auth/login/', mail.outbox[0].body)
+
+    def test_password_reset_is_queued(self):
+        User.objects.create_user(username='StasBasov',
+                                 email='stas@example.com',
+                                 password='Sup3r-secret-pass')
+        response = self.client.post(reverse('password_reset'),
+                                    {'email': 'stas@example.com'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(QueuedEmail.objects.get().recipients,
+                         'stas@example.com')
+
+    def test_metrics_show_queue(self):
+        queue_mail('a@example.com')
+        staff = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(staff)
+        data = self.client.get(reverse('metrics')).json()
+        self.assertEqual(data['mail']['queue'], {'pending': 1})
+        self.assertEqual(data['mail']['sent'], 0)
+
+
+@override_settings(EMAIL_BACKEND=QUEUED)
+class DefaultDeliveryTest(TestCase):
+    def test_queued_mail_is_written_to_files(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        User.objects.create_user(username='StasBasov',
+                                 email='stas@example.com',
+                                 password='Sup3r-secret-pass')
+        with override_settings(EMAIL_FILE_PATH=directory.name):
+            self.client.post(reverse('password_reset'),
+                             {'email': 'stas@example.com'})
+            self.assertEqual(flush(), (1, 0))
+        (name,) = os.listdir(directory.name)
+        with open(os.path.join(directory.name, name)) as stream:
+            self.assertIn('stas@example.com', stream.read())
+
+
+class BenchMailCommandTest(TestCase):
+    def test_reports_rates_and_connections(self):
+        out = StringIO()
+        call_command('bench_mail', messages=5, batch_size=2,
+                     connect_delay=0, stdout=out)
+        output = out.getvalue()
+        for name in ('file', 'smtp', 'queue', 'flush'):
+            self.assertIn(name, output)
+        self.assertIn('по письму 5, из очереди 1', output)
+        self.assertFalse(QueuedEmail.objects.exists())
@@ -0,0 +1,298 @@
+import hashlib
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.test import override_settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from yatube.routers import read_from_primary
+
+from . import lookups
+from .lookups import get_group_or_404
+from .models import Post
+
+
+class PostsCache:
+    """caches['posts'], который ищется при каждом обращении, как
+    django.core.cache.cache: подмена CACHES действует и на него."""
+
+    def __getattr__(self, name):
+        return getattr(caches['posts'], name)
+
+
+cache = PostsCache()
+
+
+@contextmanager
+def isolated_caches():
+    """Кэши того же бэкенда во временном месте вместо рабочих.
+
+    Для команд, которые наполняют базу и откатывают изменения: иначе
+    в рабочем кэше остались бы страницы, ленты и числа постов из строк,
+    которых в базе нет, а SQLite выдаст их id снова.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        location = os.path.join(directory, 'cache')
+        isolated = {
+            alias: {**config, 'LOCATION': settings.CACHE_ALIAS_LOCATION
+                    .format(location=location, alias=alias)}
+            for alias, config in settings.CACHES.items()
+        }
+        lookups.clear()
+        try:
+            with override_settings(CACHES=isolated):
+                try:
+                    yield
+                finally:
+                    for alias in isolated:
+                        caches[alias].clear()
+                        caches[alias].close()
+        finally:
+            lookups.clear()
+
+
+def also_after_commit(invalidate):
+    """Сброс кэша сейчас и ещё раз после коммита. Первый нужен, чтобы
+    пишущий в своей транзакции видел свои изменения; второй — потому что
+    читатель между ними мог положить в кэш данные без них. При откате
+    повторного сброса нет, а первый безвреден."""
+
+    @wraps(invalidate)
+    def wrapper(*args):
+        invalidate(*args)
+        transaction.on_commit(lambda: invalidate(*args))
+
+    return wrapper
+
+
+def post_card_key(post, is_author):
+    # В карточке есть имя автора и ссылки на его страницы: после смены
+    # username ключ меняется, и старая карточка больше не находится.
+    variant = 'author' if is_author else 'reader'
+    return (f'posts:card:{post.pk}:{post.updated:%Y%m%d%H%M%S%f}:'
+            f'{post.author.username}:{variant}')
+
+
+def render_post_card(post, user):
+    """Отдаёт карточку поста из кэша, отрисовывая её только при промахе.
+
+    У автора на карточке есть кнопка «Редактировать», поэтому для него
+    хранится отдельный вариант.
+    """
+    is_author = user.is_authenticated and user.pk == post.author_id
+    key = post_card_key(post, is_author)
+    card = cache.get(key)
+    if card is None:
+        card = render_to_string('misc/post_card.html', {
+            'post': post, 'is_author': is_author,
+        })
+        cache.set(key, card, settings.POST_CARD_CACHE_TIMEOUT)
+    return card
+
+
+@also_after_commit
+def invalidate_post_card(post):
+    cache.delete_many([post_card_key(post, is_author)
+                       for is_author in (False, True)])
+
+
+def index_scope():
+    newest = Post.objects.aggregate(newest=Max('pub_date'))['newest']
+    return 'index', newest
+
+
+def group_scope(slug):
+    try:
+        group = get_group_or_404(slug)
+    except Http404:
+        return None, None
+    newest = group.posts.aggregate(newest=Max('pub_date'))['newest']
+    return f'group:{group.id}', newest
+
+
+def feed_version_key(scope):
+    return f'posts:feed-version:{scope}'
+
+
+def feed_version(scope):
+    return cache.get_or_set(feed_version_key(scope), time.time_ns, None)
+
+
+def feed_etag(scope, version, newest):
+    state = f'{scope}:{version}:{newest and newest.timestamp()}'
+    return quote_etag(hashlib.md5(state.encode()).hexdigest())
+
+
+def feed_count_key(scope):
+    return f'posts:feed-count:{scope}'
+
+
+def count_posts(queryset):
+    """Число постов queryset. Точно считается не дальше двух
+    KEYSET_PAGINATION_THRESHOLD: лента длиннее листается курсором,
+    и ей хватает оценки из статистики базы. Без статистики считается всё.
+    """
+    limit = settings.KEYSET_PAGINATION_THRESHOLD * 2
+    count = queryset.order_by().values('pk')[:limit + 1].count()
+    if count <= limit:
+        return count
+    estimate = queryset.estimated_count()
+    if estimate is not None and estimate > limit:
+        return estimate
+    return queryset.count()
+
+
+def feed_count(scope, queryset):
+    """Число постов ленты для пагинатора из кэша. Сигналы постов сдвигают
+    его при создании и удалении, так что считается оно только при
+    промахе. Посчитанное кладётся через add: если за время подсчёта
+    другой запрос положил и сдвинул число, оно не затирается."""
+    key = feed_count_key(scope)
+    count = cache.get(key)
+    if count is None:
+        with read_from_primary():
+            count = count_posts(queryset)
+        if not cache.add(key, count, settings.FEED_COUNT_CACHE_TIMEOUT):
+            count = cache.get(key, count)
+    return count
+
+
+def shift_feed_counts(delta, *scopes):
+    """Сдвигает числа постов лент после коммита: при откате сдвиг
+    не остаётся в кэше."""
+
+    def shift():
+        for scope in scopes:
+            try:
+                cache.incr(feed_count_key(scope), delta)
+            except ValueError:
+                # Числа нет в кэше: посчитается при чтении.
+                pass
+
+    transaction.on_commit(shift)
+
+
+@also_after_commit
+def invalidate_feed_counts(*scopes):
+    cache.delete_many([feed_count_key(scope) for scope in scopes])
+
+
+@also_after_commit
+def invalidate_feed_pages(*group_ids):
+    """Сбрасывает закэшированные страницы главной и перечисленных групп."""
+    scopes = ['index'] + [f'group:{group_id}' for group_id in group_ids
+                          if group_id is not None]
+    cache.delete_many([feed_version_key(scope) for scope in scopes])
+
+
+def cache_anonymous_page(scope_func):
+    """Кэширует страницу ленты целиком для анонимных посетителей.
+
+    scope_func получает аргументы view и возвращает область ленты и дату
+    самого свежего поста в ней. По ним и версии ленты строится ETag, так
+    что повторный запрос получает 304 без отрисовки страницы.
+    Last-Modified не отдаётся: дата свежего поста не меняется при правке
+    или удалении постов, и If-Modified-Since вернул бы старую страницу.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            scope, newest = scope_func(*args, **kwargs)
+            if scope is None:
+                return view(request, *args, **kwargs)
+            version = feed_version(scope)
+            etag = feed_etag(scope, version, newest)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f'posts:page:{scope}:{version}:{path}'
+            response = cache.get(key)
+            if response is None:
+                with read_from_primary():
+                    response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response, settings.FEED_PAGE_CACHE_TIMEOUT)
+            response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def group_feed_key(group_id):
+    return f'posts:group-feed:{group_id}'
+
+
+def build_group_feed(group_id):
+    """Собирает id свежих постов группы (новые первыми) и их общее число."""
+    size = settings.GROUP_FEED_SIZE
+    rows = Post.objects.filter(group_id=group_id).order_by(
+        '-pub_date', '-id').values_list('pub_date', 'id')
+    head = [[pub_date.timestamp(), pk] for pub_date, pk in rows[:size]]
+    count = len(head) if len(head) < size else rows.count()
+    return {'head': head, 'count': count}
+
+
+class GroupFeed:
+    """Лента группы для Paginator.
+
+    Id первых GROUP_FEED_SIZE постов и общее их число хранятся в кэше,
+    поэтому первые страницы группы собираются одним запросом по id —
+    без COUNT и сортировки. Сигналы постов удаляют запись, а не правят
+    её: правка чтением и записью из разных процессов теряла бы посты.
+    Заново она собирается при следующем чтении.
+    Страницы глубже берутся из queryset как обычно.
+    """
+
+    def __init__(self, group):
+        self.group = group
+        self.queryset = group.posts.feed()
+        self._state = None
+
+    @property
+    def state(self):
+        if self._state is None:
+            key = group_feed_key(self.group.id)
+            self._state = cache.get(key)
+            if self._state is None:
+                with read_from_primary():
+                    self._state = build_group_feed(self.group.id)
+                cache.set(key, self._state,
+                          settings.GROUP_FEED_CACHE_TIMEOUT)
+        return self._state
+
+    def count(self):
+        return self.state['count']
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        head, count = self.state['head'], self.state['count']
+        if len(head) < count and (index.stop is None
+                                  or index.stop > len(head)):
+            return self.queryset.order_by('-pub_date', '-id')[index]
+        ids = [pk for timestamp, pk in head[index]]
+        posts = Post.objects.feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+@also_after_commit
+def invalidate_group_feeds(*group_ids):
+    cache.delete_many([group_feed_key(group_id) for group_id in group_ids
+                       if group_id is not None])
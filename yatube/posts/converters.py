@@ -0,0 +1,14 @@
+from .syndication import FEEDS
+
+
+class FeedKindConverter:
+    """Только известные форматы лент. С <str:kind> адрес feeds/<число>/
+    перехватывал бы страницы постов автора с именем feeds."""
+
+    regex = '|'.join(FEEDS)
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -1,4 +1,6 @@
-from django.forms import ModelForm
+from django.conf import settings
+from django.forms import ModelForm, ValidationError
+from django.template.defaultfilters import filesizeformat
 
 from .models import Post
 
@@ -7,3 +9,20 @@ class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group')
+
+
+class PostImageForm(ModelForm):
+    """Картинка поста. Отдельно от PostForm: её поля — только текст
+    и группа."""
+
+    class Meta:
+        model = Post
+        fields = ('image',)
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if image and image.size > settings.POST_IMAGE_MAX_SIZE:
+            raise ValidationError(
+                'Картинка больше '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_SIZE)}.')
+        return image
@@ -0,0 +1,19 @@
+"""Фоновые задачи постов (см. tasks.queue)."""
+from tasks.queue import task
+
+from .cache import invalidate_feed_pages, invalidate_post_card
+from .models import Post
+from .thumbnails import generate_thumbnails
+
+
+@task
+def generate_post_thumbnails(post_id):
+    """Создаёт миниатюры картинки поста и сбрасывает закэшированные
+    без неё карточку и страницы ленты."""
+    post = Post.objects.exclude(image='').select_related('author').only(
+        'image', 'updated', 'group', 'author__username',
+    ).filter(id=post_id).first()
+    if post is None or not generate_thumbnails(post):
+        return
+    invalidate_post_card(post)
+    invalidate_feed_pages(post.group_id)
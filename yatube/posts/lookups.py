@@ -0,0 +1,113 @@
+"""Кэш поиска групп по slug и авторов по username в памяти процесса.
+
+Эти соответствия почти не меняются, а нужны почти каждой странице.
+Сигналы сбрасывают записи в этом процессе, в остальных воркерах запись
+живёт не дольше TTL. Отсутствующие slug и username тоже запоминаются,
+но на меньший срок, чтобы перебор несуществующих адресов не шёл в базу.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import Http404
+
+from yatube.routers import read_from_primary
+
+from .models import Group, User
+
+NOT_FOUND = object()
+
+
+class LRUCache:
+    """Словарь на maxsize записей с вытеснением давно не читанных
+    и сроком жизни каждой записи."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """Удаляет записи, значение которых подходит под predicate."""
+        with self._lock:
+            for key in [key for key, (value, expires) in self._data.items()
+                        if value is not NOT_FOUND and predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+groups = LRUCache(settings.LOOKUP_CACHE_SIZE)
+users = LRUCache(settings.LOOKUP_CACHE_SIZE)
+
+
+def lookup(lru, key, load):
+    obj = lru.get(key)
+    if obj is None:
+        with read_from_primary():
+            obj = load()
+        if obj is None:
+            lru.set(key, NOT_FOUND, settings.LOOKUP_CACHE_NEGATIVE_TTL)
+        else:
+            lru.set(key, obj, settings.LOOKUP_CACHE_TTL)
+    if obj is NOT_FOUND or obj is None:
+        raise Http404
+    # Копия, чтобы представление не поменяло объект для всего процесса.
+    return copy.copy(obj)
+
+
+def get_group_or_404(slug):
+    return lookup(groups, slug,
+                  lambda: Group.objects.filter(slug=slug).first())
+
+
+def get_user_or_404(username):
+    """Автор по username. Загружаются только поля для страниц автора."""
+    return lookup(users, username, lambda: User.objects.only(
+        'id', 'username', 'first_name', 'last_name',
+    ).filter(username=username).first())
+
+
+def forget_group(group):
+    groups.delete(group.slug)
+    groups.delete_matching(lambda cached: cached.pk == group.pk)
+
+
+def forget_user(user):
+    users.delete(user.username)
+    users.delete_matching(lambda cached: cached.pk == user.pk)
+
+
+def clear():
+    groups.clear()
+    users.clear()
@@ -0,0 +1,96 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import isolated_caches
+from posts.models import Group, Post, User
+from posts.paginators import NEXT, encode_cursor
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?posts_post\b(?! USING)')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ('Выполняет запросы лент на наполненной базе и проверяет '
+            'через EXPLAIN QUERY PLAN, что они идут по индексам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000,
+                            help='Сколько постов создать перед проверкой.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN есть только в SQLite.')
+        self.verbosity = options['verbosity']
+        try:
+            # Посты видны только в этой транзакции на основной базе,
+            # и запросы перехватываются на её соединении: без реплик.
+            # Кэши временные: откаченные посты в рабочих не останутся.
+            with override_settings(DATABASE_REPLICAS=[]), \
+                    isolated_caches(), transaction.atomic():
+                problems = self.check_feeds(options['posts'])
+                raise Rollback
+        except Rollback:
+            pass
+        if problems:
+            raise CommandError(
+                'Запросы без подходящего индекса:\n' + '\n'.join(problems))
+        self.stdout.write(self.style.SUCCESS('Все запросы лент на индексах.'))
+
+    def seed(self, number_of_posts):
+        author = User.objects.create_user(username='explain_feeds_author')
+        group = Group.objects.create(title='explain_feeds',
+                                     slug='explain-feeds')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=author,
+                 group=group if i % 2 else None)
+            for i in range(number_of_posts)
+        )
+        return author, group, author.posts.order_by('-pub_date', '-id')[5]
+
+    def check_feeds(self, number_of_posts):
+        author, group, post = self.seed(number_of_posts)
+        client = Client()
+        client.force_login(author)
+        cursor = {'cursor': encode_cursor(NEXT, post)}
+        feeds = [
+            reverse('index'),
+            reverse('group', kwargs={'slug': group.slug}),
+            reverse('profile', kwargs={'username': author.username}),
+        ]
+        requests = [(url, {'page': 2}) for url in feeds]
+        requests += [(url, cursor) for url in feeds]
+        requests.append((reverse('posts', kwargs={
+            'username': author.username, 'post_id': post.id}), {}))
+        problems = []
+        for url, params in requests:
+            with override_settings(
+                    KEYSET_PAGINATION_THRESHOLD=number_of_posts + 1):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url, params)
+            if response.status_code != 200:
+                raise CommandError(f'{url} вернул {response.status_code}')
+            for query in queries:
+                problems += self.explain(url, query['sql'])
+        return problems
+
+    def explain(self, url, sql):
+        if not sql.startswith('SELECT') or 'posts_post' not in sql:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+        if self.verbosity > 1:
+            self.stdout.write(f'{url}\n  {sql}\n  ' + '\n  '.join(plan))
+        return [
+            f'{url}: {step}\n  {sql}' for step in plan
+            if FULL_SCAN.search(step) or TEMP_SORT in step
+        ]
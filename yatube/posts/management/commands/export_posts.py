@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.transfer import FORMATS, detect_format, export_rows, serialize_rows
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSONL или CSV, не загружая их все в память.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для выгрузки, - для stdout.')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='По умолчанию определяется по расширению.')
+        parser.add_argument('--author', help='Выгрузить посты одного автора.')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        posts = Post.objects.all()
+        if options['author']:
+            posts = posts.filter(author__username=options['author'])
+        lines = serialize_rows(
+            export_rows(posts, options['chunk_size']), fmt)
+        if path == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(lines)
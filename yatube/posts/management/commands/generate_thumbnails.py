@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from posts.cache import invalidate_feed_pages, invalidate_post_card
+from posts.models import Post
+from posts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = ('Создаёт недостающие миниатюры картинок постов, чтобы '
+            'страницы не пересчитывали их при запросе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int,
+                            help='Обработать только эти посты.')
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # username автора входит в ключ карточки.
+        posts = Post.objects.exclude(image='').select_related('author').only(
+            'image', 'updated', 'group', 'author__username',
+        ).order_by('id')
+        if options['post_ids']:
+            posts = posts.filter(id__in=options['post_ids'])
+        generated = 0
+        groups = set()
+        for post in posts.iterator(chunk_size=options['chunk_size']):
+            if not generate_thumbnails(post):
+                continue
+            # Карточки и страницы в кэше собраны ещё без картинки.
+            invalidate_post_card(post)
+            groups.add(post.group_id)
+            generated += 1
+        if generated:
+            invalidate_feed_pages(*groups)
+        self.stdout.write(f'Постов с новыми миниатюрами: {generated}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.cache import invalidate_feed_counts
+from posts.models import AuthorStats, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов авторов и сбрасывает число '
+            'постов ленты, например после массового импорта в обход '
+            'сигналов. Обновляет статистику базы для оценок числа постов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='Пересчитать только этих авторов.')
+
+    def handle(self, *args, **options):
+        authors = User.objects.all()
+        if options['usernames']:
+            authors = authors.filter(username__in=options['usernames'])
+        fixed = AuthorStats.objects.recount(authors)
+        invalidate_feed_counts('index')
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Post._meta.db_table}')
+        self.stdout.write(f'Исправлено счётчиков: {fixed}')
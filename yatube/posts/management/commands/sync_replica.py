@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из '
+            'DATABASE_REPLICAS через backup API, не останавливая сайт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('replicas', nargs='*',
+                            help='Обновить только эти реплики.')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Копирование файлом есть только в SQLite.')
+        replicas = options['replicas'] or settings.DATABASE_REPLICAS
+        unknown = set(replicas) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(
+                'Нет таких реплик: ' + ', '.join(sorted(unknown)))
+        if not replicas:
+            raise CommandError('Реплики не настроены: YATUBE_DB_REPLICAS.')
+        primary.ensure_connection()
+        for alias in replicas:
+            connections[alias].close()
+            path = connections[alias].settings_dict['NAME']
+            target = sqlite3.connect(path)
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {path}')
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import Count, F
+from sorl.thumbnail import ImageField
 
 User = get_user_model()
 
@@ -13,16 +15,57 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для вывода в ленте: автор и группа одним запросом,
+        только те столбцы, что нужны шаблонам."""
+        return self.select_related('author', 'group').only(
+            'text', 'pub_date', 'updated', 'image', 'author', 'group',
+            'author__username', 'author__first_name', 'author__last_name',
+            'group__title', 'group__slug',
+        )
+
+    def estimated_count(self):
+        """Число постов по статистике ANALYZE (sqlite_stat1) без обхода
+        таблицы. Только для queryset без фильтров; None, если база
+        не SQLite или статистику ещё не собирали."""
+        connection = connections[self.db]
+        if self.query.has_filters() or connection.vendor != 'sqlite':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master "
+                           "WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s',
+                           [self.model._meta.db_table])
+            # Первое число stat — строк в таблице или индексе.
+            rows = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+        return max(rows, default=None)
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField('date published', auto_now_add=True)
+    updated = models.DateTimeField('date updated', auto_now=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='posts')
     group = models.ForeignKey(Group, on_delete=models.SET_NULL,
                               blank=True, null=True, related_name='posts')
+    image = ImageField('Картинка', upload_to='posts/', blank=True)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date'],
+                         name='posts_post_pub_date_idx'),
+            models.Index(fields=['group', 'pub_date'],
+                         name='posts_post_group_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='posts_post_author_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -30,3 +73,64 @@ class Post(models.Model):
     @property
     def pub_date_format(self):
         return self.pub_date.strftime('%d %b %Y')
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+    def posts_count(self, author):
+        stats = self.filter(author=author).values_list('posts_count',
+                                                       flat=True)
+        return stats.first() or 0
+
+    def add_posts(self, author_id, delta):
+        """Атомарно сдвигает счётчик постов автора на delta. Если счётчик
+        ушёл бы ниже нуля, он разошёлся с таблицей (например, после
+        импорта в обход сигналов) и пересчитывается."""
+        with transaction.atomic():
+            if delta < 0:
+                updated = self.filter(
+                    author_id=author_id, posts_count__gte=-delta,
+                ).update(posts_count=F('posts_count') + delta)
+                if not updated:
+                    self.recount(User.objects.filter(id=author_id))
+                return
+            updated = self.filter(author_id=author_id).update(
+                posts_count=F('posts_count') + delta)
+            if updated:
+                return
+            stats, created = self.get_or_create(
+                author_id=author_id, defaults={'posts_count': delta})
+            if not created:
+                self.filter(author_id=author_id).update(
+                    posts_count=F('posts_count') + delta)
+
+    def recount(self, authors):
+        """Пересчитывает счётчики авторов по таблице постов и возвращает
+        число исправленных записей."""
+        actual = dict(authors.annotate(
+            number_of_posts=Count('posts')).values_list(
+            'id', 'number_of_posts'))
+        stored = dict(self.filter(author__in=authors).values_list(
+            'author_id', 'posts_count'))
+        drifted = {
+            author_id: posts_count
+            for author_id, posts_count in actual.items()
+            if stored.get(author_id) != posts_count
+        }
+        with transaction.atomic():
+            self.filter(author_id__in=drifted).delete()
+            self.bulk_create(
+                AuthorStats(author_id=author_id, posts_count=posts_count)
+                for author_id, posts_count in drifted.items()
+            )
+        return len(drifted)
+
+
+class AuthorStats(models.Model):
+    author = models.OneToOneField(User, on_delete=models.CASCADE,
+                                  primary_key=True, related_name='stats')
+    posts_count = models.PositiveIntegerField(default=0)
+
+    objects = AuthorStatsQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.author_id}: {self.posts_count}'
@@ -0,0 +1,199 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+NEXT = 'n'
+PREVIOUS = 'p'
+ELLIPSIS = '…'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def pack_cursor(values):
+    """Упаковывает позицию в выдаче в непрозрачную строку для ссылки."""
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def unpack_cursor(cursor):
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + padding)
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values
+
+
+def encode_cursor(direction, post):
+    return pack_cursor([direction, post.pub_date.isoformat(), post.pk])
+
+
+def decode_cursor(cursor):
+    try:
+        direction, pub_date, pk = unpack_cursor(cursor)
+        pub_date = parse_datetime(pub_date)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        raise InvalidCursor(cursor)
+    if not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+    return direction, pub_date, pk
+
+
+class KeysetPage(Page):
+    def __init__(self, object_list, paginator, next_cursor=None,
+                 previous_cursor=None):
+        super().__init__(object_list, 1, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator(Paginator):
+    """Постраничный вывод ленты по ключу (pub_date, id) без OFFSET и COUNT.
+
+    Страница адресуется курсором — позицией крайнего поста соседней
+    страницы, поэтому стоимость выборки не зависит от глубины.
+    """
+    keyset = True
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._build_page(NEXT, None)
+        direction, pub_date, pk = decode_cursor(cursor)
+        return self._build_page(direction, (pub_date, pk))
+
+    def _build_page(self, direction, position):
+        queryset = self.object_list.order_by('-pub_date', '-id')
+        if position is not None:
+            pub_date, pk = position
+            if direction == NEXT:
+                queryset = queryset.filter(
+                    Q(pub_date__lte=pub_date),
+                    Q(pub_date__lt=pub_date) | Q(id__lt=pk),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__gte=pub_date),
+                    Q(pub_date__gt=pub_date) | Q(id__gt=pk),
+                ).order_by('pub_date', 'id')
+        posts = list(queryset[:self.per_page + 1])
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == PREVIOUS:
+            posts.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        if not posts:
+            return KeysetPage(posts, self)
+        return KeysetPage(
+            posts, self,
+            next_cursor=encode_cursor(NEXT, posts[-1]) if has_next else None,
+            previous_cursor=(
+                encode_cursor(PREVIOUS, posts[0]) if has_previous else None
+            ),
+        )
+
+
+class FeedPage(Page):
+    @property
+    def elided_page_range(self):
+        return self.paginator.get_elided_page_range(
+            self.number, on_each_side=settings.PAGINATOR_ON_EACH_SIDE,
+            on_ends=settings.PAGINATOR_ON_ENDS)
+
+
+class FeedPaginator(Paginator):
+    """Нумерованные страницы ленты с окном номеров вокруг текущей.
+
+    count можно передать готовым (из кэша или счётчика). Иначе QuerySet
+    считается не дальше limit строк: COUNT по подзапросу с LIMIT стоит
+    не больше limit строк, а точное число длинной ленте не нужно —
+    она листается курсором.
+    """
+    ELLIPSIS = ELLIPSIS
+
+    def __init__(self, object_list, per_page, count=None, limit=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+        self.limit = limit
+
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        if isinstance(self.object_list, QuerySet) and self.limit is not None:
+            return self.object_list.order_by().values('pk')[
+                :self.limit + 1].count()
+        return super().count
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3,
+                              on_ends=2):
+        """Номера страниц вокруг number и по краям, пропуски — ELLIPSIS.
+        Повторяет Paginator.get_elided_page_range из Django 3.2."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > (1 + on_each_side + on_ends) + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < (self.num_pages - on_each_side - on_ends) - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
+
+
+def get_page(request, feed, count=None):
+    """Возвращает страницу ленты: по номеру для небольших лент
+    и по курсору для лент длиннее KEYSET_PAGINATION_THRESHOLD.
+
+    feed — QuerySet или готовая последовательность вроде GroupFeed
+    с методом count() и исходным queryset для курсоров; count — уже
+    известное число постов ленты.
+    """
+    per_page = settings.NUMBER_OF_POSTS_ON_PAGE
+    threshold = settings.KEYSET_PAGINATION_THRESHOLD
+    cursor = request.GET.get('cursor')
+    queryset = feed if isinstance(feed, QuerySet) else feed.queryset
+    paginator = FeedPaginator(feed, per_page, count=count, limit=threshold)
+    if cursor or paginator.count > threshold:
+        return KeysetPaginator(queryset, per_page).get_page(cursor)
+    return paginator.get_page(request.GET.get('page'))
@@ -0,0 +1,152 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts хранит только токены: текст лежит в posts_post
+(external content), а триггеры держат индекс в согласии с таблицей.
+При изменении схемы posts_post Django пересоздаёт таблицу и её триггеры
+пропадают, поэтому индекс проверяется после каждой миграции.
+"""
+import re
+import secrets
+
+from django.conf import settings
+from django.db import connections, router
+
+from .cache import cache
+from .models import Post
+from .paginators import (InvalidCursor, KeysetPage, KeysetPaginator,
+                         pack_cursor, unpack_cursor)
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2')"
+)
+
+TRIGGERS = {
+    f'{FTS_TABLE}_insert': (
+        f'CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON posts_post '
+        f'BEGIN INSERT INTO {FTS_TABLE}(rowid, text) '
+        f'VALUES (new.id, new.text); END'
+    ),
+    f'{FTS_TABLE}_delete': (
+        f'CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON posts_post '
+        f'BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+        f"VALUES ('delete', old.id, old.text); END"
+    ),
+    f'{FTS_TABLE}_update': (
+        f'CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text '
+        f'ON posts_post '
+        f'BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) '
+        f"VALUES ('delete', old.id, old.text); "
+        f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); '
+        f'END'
+    ),
+}
+
+
+def ensure_search_index(connection):
+    """Создаёт недостающие индекс и триггеры и тогда же перестраивает
+    индекс по таблице постов."""
+    if connection.vendor != 'sqlite':
+        return
+    if Post._meta.db_table not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        )
+        existing = {name for name, in cursor.fetchall()}
+        missing = [sql for name, sql in TRIGGERS.items()
+                   if name not in existing]
+        if FTS_TABLE not in existing:
+            missing.insert(0, CREATE_TABLE)
+        if not missing:
+            return
+        for sql in missing:
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Превращает запрос пользователя в выражение MATCH: все слова
+    обязательны, синтаксис FTS5 из запроса не исполняется."""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query))
+
+
+def search_key(token):
+    return f'posts:search:{token}'
+
+
+class SearchPaginator(KeysetPaginator):
+    """Выдача поиска по релевантности (bm25).
+
+    bm25 считается по всем совпадениям и зависит от всего индекса, так
+    что при каждой правке постов оценки сдвигаются. Поэтому порядок
+    считается один раз, на первой странице: id первых SEARCH_MAX_RESULTS
+    совпадений кладутся в кэш, а курсор хранит ключ этого списка и
+    смещение в нём. Следующие страницы читают посты по id из списка —
+    без повторного ранжирования и без пропусков и повторов.
+    """
+
+    def __init__(self, query, per_page, group=None, author=None):
+        super().__init__(Post.objects.none(), per_page)
+        self.match = match_expression(query)
+        self.group = group
+        self.author = author
+
+    def page(self, cursor=None):
+        if not self.match:
+            return KeysetPage([], self)
+        if cursor:
+            try:
+                token, offset = unpack_cursor(cursor)
+            except (TypeError, ValueError):
+                raise InvalidCursor(cursor)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursor(cursor)
+            ids = cache.get(search_key(token))
+            if ids is None:
+                # Список истёк: выдача начнётся сначала.
+                raise InvalidCursor(cursor)
+        else:
+            token, offset = secrets.token_urlsafe(12), 0
+            ids = self.ranked(settings.SEARCH_MAX_RESULTS)
+            if len(ids) > self.per_page:
+                cache.set(search_key(token), ids,
+                          settings.SEARCH_RESULTS_CACHE_TIMEOUT)
+        chunk = ids[offset:offset + self.per_page]
+        posts = Post.objects.feed().in_bulk(chunk)
+        end = offset + self.per_page
+        return KeysetPage(
+            [posts[pk] for pk in chunk if pk in posts], self,
+            next_cursor=(pack_cursor([token, end])
+                         if end < len(ids) else None),
+            previous_cursor=(
+                pack_cursor([token, max(offset - self.per_page, 0)])
+                if offset else None),
+        )
+
+    def ranked(self, limit):
+        """id совпадений, самые релевантные первыми."""
+        filters = ['posts_post_fts MATCH %s']
+        params = [self.match]
+        if self.group is not None:
+            filters.append('posts_post.group_id = %s')
+            params.append(self.group.id)
+        if self.author is not None:
+            filters.append('posts_post.author_id = %s')
+            params.append(self.author.id)
+        params.append(limit)
+        sql = (
+            f'SELECT posts_post.id FROM {FTS_TABLE} '
+            f'JOIN posts_post ON posts_post.id = {FTS_TABLE}.rowid '
+            f'WHERE {" AND ".join(filters)} '
+            f'ORDER BY bm25({FTS_TABLE}), posts_post.id DESC LIMIT %s'
+        )
+        connection = connections[router.db_for_read(Post)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [pk for pk, in cursor.fetchall()]
@@ -0,0 +1,83 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .cache import (invalidate_feed_pages, invalidate_group_feeds,
+                    invalidate_post_card, shift_feed_counts)
+from .jobs import generate_post_thumbnails
+from .lookups import forget_group, forget_user
+from .models import AuthorStats, Group, Post, User
+from .search import ensure_search_index
+
+UNKNOWN = object()
+
+
+def image_name(instance):
+    value = instance.__dict__.get('image', UNKNOWN)
+    return getattr(value, 'name', value)
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # Группа на момент загрузки: при сохранении видно, сменилась ли она.
+    # Если поле отложено (only/defer), группа неизвестна.
+    instance._loaded_group_id = instance.__dict__.get('group_id', UNKNOWN)
+    instance._loaded_image = image_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    previous = instance._loaded_group_id
+    if created:
+        AuthorStats.objects.add_posts(instance.author_id, 1)
+        shift_feed_counts(1, 'index')
+        invalidate_group_feeds(instance.group_id)
+    else:
+        invalidate_post_card(instance)
+        if previous is UNKNOWN:
+            invalidate_group_feeds(instance.group_id)
+        elif previous != instance.group_id:
+            invalidate_group_feeds(previous, instance.group_id)
+            if previous is not None:
+                invalidate_feed_pages(previous)
+    if instance.image and (created or instance._loaded_image is UNKNOWN
+                           or instance._loaded_image != instance.image.name):
+        # Миниатюры долго считать: воркер создаст их после коммита.
+        generate_post_thumbnails.delay(instance.id)
+    instance._loaded_group_id = instance.group_id
+    instance._loaded_image = instance.image.name
+    invalidate_feed_pages(instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    AuthorStats.objects.add_posts(instance.author_id, -1)
+    shift_feed_counts(-1, 'index')
+    # В ключе карточки username автора. При удалении queryset автор
+    # не загружен, а карточку удалённого поста никто не запросит:
+    # она истечёт сама, без запроса автора на каждый пост.
+    if Post._meta.get_field('author').is_cached(instance):
+        invalidate_post_card(instance)
+    invalidate_group_feeds(instance.group_id)
+    invalidate_feed_pages(instance.group_id)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    forget_group(instance)
+    invalidate_feed_pages(instance.id)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    forget_group(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance)
+
+
+def create_search_index(sender, using, **kwargs):
+    ensure_search_index(connections[using])
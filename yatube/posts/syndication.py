@@ -0,0 +1,88 @@
+"""Ленты Atom и RSS, которые пишутся по частям.
+
+Генераторы django.utils.feedgenerator собирают весь документ в памяти.
+Здесь тот же XML выдаётся кусками: шапка, затем каждая запись по мере
+чтения постов из базы, затем закрывающие теги.
+"""
+from io import StringIO
+
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.xmlutils import SimplerXMLGenerator
+
+
+class StreamingFeedMixin:
+    def __init__(self, *args, updated=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updated = updated
+
+    def latest_post_date(self):
+        # Записи ещё не прочитаны, дату самого свежего поста передают.
+        return self.updated or super().latest_post_date()
+
+    def stream(self, items, encoding='utf-8'):
+        """Документ по частям; items — словари аргументов add_item."""
+        buffer = StringIO()
+        handler = SimplerXMLGenerator(buffer, encoding)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        handler.startDocument()
+        self.start_document(handler)
+        yield flush()
+        for item in items:
+            self.items = []
+            self.add_item(**item)
+            self.write_items(handler)
+            yield flush()
+        self.end_document(handler)
+        yield flush()
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    def start_document(self, handler):
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end_document(self, handler):
+        handler.endElement('feed')
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    def start_document(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def end_document(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+FEEDS = {
+    'atom': StreamingAtomFeed,
+    'rss': StreamingRssFeed,
+}
+
+
+def feed_items(request, queryset, size):
+    """Свежие посты queryset как записи ленты, чтение пачками."""
+    posts = queryset.order_by('-pub_date', '-id')[:size]
+    for post in posts.iterator(chunk_size=100):
+        link = request.build_absolute_uri(reverse('posts', kwargs={
+            'username': post.author.username, 'post_id': post.pk}))
+        yield {
+            'title': post.text[:50],
+            'link': link,
+            'description': post.text,
+            'author_name': (post.author.get_full_name()
+                            or post.author.username),
+            'pubdate': post.pub_date,
+            'updateddate': post.updated,
+            'unique_id': link,
+            'categories': [post.group.title] if post.group_id else (),
+        }
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from .. import thumbnails
+from ..cache import render_post_card
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    return mark_safe(render_post_card(post, context['user']))
+
+
+@register.simple_tag
+def post_image(post):
+    return thumbnails.post_image(post)
@@ -0,0 +1,95 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..cache import cache, feed_count_key
+from ..models import AuthorStats, Group, Post, User
+
+
+class ExplainFeedsCommandTest(TestCase):
+    def test_feed_queries_use_indexes(self):
+        out = StringIO()
+        call_command('explain_feeds', posts=50, stdout=out)
+        self.assertIn('Все запросы лент на индексах.', out.getvalue())
+
+    def test_seeded_posts_are_rolled_back(self):
+        call_command('explain_feeds', posts=50, stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+
+    def test_live_caches_are_untouched(self):
+        cache.clear()
+        cache.set('sentinel', 'живой')
+        self.addCleanup(cache.clear)
+        call_command('explain_feeds', posts=50, stdout=StringIO())
+        self.assertEqual(cache.get('sentinel'), 'живой')
+        self.assertIsNone(cache.get(feed_count_key('index')))
+
+
+class RecountPostsCommandTest(TestCase):
+    def test_recount_repairs_drift_after_bulk_create(self):
+        user = User.objects.create_user(username='test_user')
+        Post.objects.create(author=user, text='Пост')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Импорт {i}') for i in range(4))
+        self.assertEqual(AuthorStats.objects.posts_count(user), 1)
+        out = StringIO()
+        call_command('recount_posts', stdout=out)
+        self.assertEqual(AuthorStats.objects.posts_count(user), 5)
+        self.assertIn('Исправлено счётчиков: 1', out.getvalue())
+        # Статистика для оценок числа постов обновлена.
+        self.assertEqual(Post.objects.estimated_count(), 5)
+
+
+class TransferPostsCommandsTest(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.user = User.objects.create_user(username='StasBasov')
+        self.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы')
+        self.post = Post.objects.create(author=self.user, group=self.group,
+                                        text='Тестовый текст, "с кавычками"')
+        self.post_2 = Post.objects.create(author=self.user,
+                                          text='Пост\nбез группы')
+
+    def round_trip(self, filename):
+        path = os.path.join(self.directory, filename)
+        call_command('export_posts', path)
+        exported = list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author', 'group'))
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, batch_size=1, stdout=out)
+        self.assertIn('Загружено постов: 2', out.getvalue())
+        self.assertEqual(list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author', 'group')), exported)
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 2)
+
+    def test_jsonl_round_trip(self):
+        self.round_trip('posts.jsonl')
+
+    def test_csv_round_trip(self):
+        self.round_trip('posts.csv')
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_posts', '-', format='csv', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'text,pub_date,author,group')
+
+    def test_unknown_author_is_reported(self):
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w') as stream:
+            stream.write('{"text": "Пост", "author": "nobody"}\n')
+        with self.assertRaisesMessage(CommandError, 'нет автора nobody'):
+            call_command('import_posts', path)
+        call_command('import_posts', path, create_missing=True,
+                     stdout=StringIO())
+        author = User.objects.get(username='nobody')
+        self.assertEqual(AuthorStats.objects.posts_count(author), 1)
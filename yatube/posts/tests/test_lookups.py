@@ -0,0 +1,75 @@
+from django.http import Http404
+from django.test import TestCase, override_settings
+
+from .. import lookups
+from ..lookups import LRUCache, get_group_or_404, get_user_or_404
+from ..models import Group, User
+
+
+class LRUCacheTest(TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        lru = LRUCache(2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+    def test_expired_entry_is_dropped(self):
+        lru = LRUCache(2)
+        lru.set('a', 1, 0)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+
+
+class LookupTest(TestCase):
+    def setUp(self):
+        lookups.clear()
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.user = User.objects.create_user(username='StasBasov')
+
+    def test_group_is_loaded_once(self):
+        get_group_or_404('group')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_or_404('group'), self.group)
+
+    def test_missing_slug_is_cached(self):
+        with self.assertRaises(Http404):
+            get_group_or_404('missing')
+        with self.assertNumQueries(0):
+            with self.assertRaises(Http404):
+                get_group_or_404('missing')
+
+    def test_renamed_group_is_forgotten(self):
+        get_group_or_404('group')
+        self.group.slug = 'renamed'
+        self.group.save()
+        with self.assertRaises(Http404):
+            get_group_or_404('group')
+        self.assertEqual(get_group_or_404('renamed').slug, 'renamed')
+
+    def test_new_user_replaces_cached_miss(self):
+        with self.assertRaises(Http404):
+            get_user_or_404('newcomer')
+        User.objects.create_user(username='newcomer')
+        self.assertEqual(get_user_or_404('newcomer').username, 'newcomer')
+
+    def test_deleted_user_is_forgotten(self):
+        get_user_or_404('StasBasov')
+        self.user.delete()
+        with self.assertRaises(Http404):
+            get_user_or_404('StasBasov')
+
+    def test_cached_objects_are_not_shared(self):
+        get_group_or_404('group').title = 'Изменено в представлении'
+        self.assertEqual(get_group_or_404('group').title, 'Группа')
+
+    @override_settings(LOOKUP_CACHE_NEGATIVE_TTL=0)
+    def test_negative_ttl(self):
+        with self.assertRaises(Http404):
+            get_user_or_404('newcomer')
+        with self.assertNumQueries(1):
+            with self.assertRaises(Http404):
+                get_user_or_404('newcomer')
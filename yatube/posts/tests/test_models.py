@@ -1,6 +1,12 @@
+import datetime as dt
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from ..models import Group, Post, User
+from ..models import AuthorStats, Group, Post, User
+from ..transfer import bulk_create_posts
 
 
 class TaskModelTest(TestCase):
@@ -22,3 +28,78 @@ class TaskModelTest(TestCase):
         group = TaskModelTest.group
         expected_object_name = group.title
         self.assertEqual(expected_object_name, str(group))
+
+
+class AuthorStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='test_user')
+
+    def test_counter_follows_created_and_deleted_posts(self):
+        posts = [Post.objects.create(author=self.user, text=f'Пост {i}')
+                 for i in range(3)]
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 3)
+        posts[0].delete()
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 2)
+
+    def test_editing_post_keeps_counter(self):
+        post = Post.objects.create(author=self.user, text='Пост')
+        post.text = 'Измененный пост'
+        post.save()
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 1)
+
+    def test_delete_after_bulk_create_drift(self):
+        Post.objects.create(author=self.user, text='Пост')
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Импорт {i}') for i in range(4))
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 1)
+        for post in Post.objects.all()[:2]:
+            post.delete()
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 3)
+
+    def test_author_without_posts_has_zero(self):
+        self.assertEqual(AuthorStats.objects.posts_count(self.user), 0)
+
+
+class BulkCreatePostsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='StasBasov')
+        self.past = timezone.now() - dt.timedelta(days=30)
+
+    def test_keeps_dates_of_created_posts_only(self):
+        Post.objects.create(author=self.user, text='Старый')
+        posts = bulk_create_posts([
+            Post(author=self.user, text=f'Импорт {i}',
+                 pub_date=self.past - dt.timedelta(days=i))
+            for i in range(3)
+        ], batch_size=2)
+        dates = dict(Post.objects.values_list('text', 'pub_date'))
+        for i in range(3):
+            self.assertEqual(dates[f'Импорт {i}'],
+                             self.past - dt.timedelta(days=i))
+        self.assertEqual([post.pk for post in posts],
+                         list(Post.objects.filter(text__startswith='Импорт')
+                              .order_by('id').values_list('id', flat=True)))
+        # Обычное сохранение по-прежнему ставит текущее время.
+        post = Post.objects.create(author=self.user, text='Новый',
+                                   pub_date=self.past)
+        self.assertGreater(post.pub_date, self.past)
+        self.assertGreater(dates['Старый'], self.past)
+
+    def test_each_row_is_written_once_with_fresh_ids(self):
+        removed = Post.objects.create(author=self.user, text='Удалённый')
+        removed_id = removed.pk
+        removed.delete()
+        with CaptureQueriesContext(connection) as queries:
+            posts = bulk_create_posts([
+                Post(author=self.user, text=f'Импорт {i}',
+                     pub_date=self.past)
+                for i in range(3)
+            ])
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('UPDATE "posts_post"')])
+        # id удалённого поста не выдаётся снова, как и у AUTOINCREMENT.
+        self.assertEqual([post.pk for post in posts],
+                         [removed_id + 1, removed_id + 2, removed_id + 3])
+        self.assertEqual(
+            Post.objects.create(author=self.user, text='Новый').pk,
+            removed_id + 4)
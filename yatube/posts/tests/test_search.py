@@ -0,0 +1,127 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import cache
+from ..models import Group, Post, User
+from ..search import TRIGGERS, ensure_search_index
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.user_2 = User.objects.create_user(username='TatianaK')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы')
+        cls.cats = Post.objects.create(
+            author=cls.user, group=cls.group,
+            text='Кот, кот и ещё раз кот')
+        cls.cat_and_dog = Post.objects.create(
+            author=cls.user_2,
+            text='Кот гуляет с собакой, собака гуляет с котом')
+        cls.dog = Post.objects.create(author=cls.user, text='Просто собака')
+
+    def search(self, **params):
+        response = self.client.get(reverse('search'), params)
+        return list(response.context['page'])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search(q='КОТ'), [self.cats, self.cat_and_dog])
+
+    def test_all_words_are_required(self):
+        self.assertEqual(self.search(q='кот собака'), [self.cat_and_dog])
+
+    def test_group_and_author_filters(self):
+        self.assertEqual(self.search(q='кот', group=self.group.slug),
+                         [self.cats])
+        self.assertEqual(self.search(q='кот', author=self.user_2.username),
+                         [self.cat_and_dog])
+
+    def test_query_syntax_is_not_executed(self):
+        self.assertEqual(self.search(q='собака OR "кот*'), [])
+        self.assertEqual(self.search(q=''), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.dog.text = 'Просто попугай'
+        self.dog.save()
+        self.assertEqual(self.search(q='попугай'), [self.dog])
+        self.assertEqual(self.search(q='просто собака'), [])
+        self.dog.delete()
+        self.assertEqual(self.search(q='попугай'), [])
+
+    def test_missing_triggers_are_restored(self):
+        with connection.cursor() as cursor:
+            for name in TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {name}')
+        ensure_search_index(connection)
+        post = Post.objects.create(author=self.user, text='Хомяк')
+        self.assertEqual(self.search(q='хомяк'), [post])
+
+
+class SearchPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        for i in range(25):
+            Post.objects.create(author=cls.user,
+                                text=f'Тестовый пост номер - {i}')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_page(self, **params):
+        response = self.client.get(reverse('search'),
+                                   {'q': 'тестовый пост', **params})
+        return response.context['page']
+
+    def test_cursor_walk_returns_every_match_once(self):
+        pages = []
+        params = {'q': 'тестовый пост'}
+        while True:
+            response = self.client.get(reverse('search'), params)
+            page = response.context['page']
+            pages.append(page)
+            if not page.has_next():
+                break
+            self.assertContains(response, 'q=')
+            params['cursor'] = page.next_cursor
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        walked = {post.id for page in pages for post in page}
+        self.assertEqual(walked,
+                         set(Post.objects.values_list('id', flat=True)))
+        params['cursor'] = pages[2].previous_cursor
+        response = self.client.get(reverse('search'), params)
+        self.assertEqual(list(response.context['page']), list(pages[1]))
+
+    def test_order_is_kept_while_index_changes(self):
+        first = self.get_page()
+        # Новые посты меняют bm25 всех совпадений, но не уже начатую выдачу.
+        for i in range(5):
+            Post.objects.create(author=self.user,
+                                text=f'Тестовый тестовый пост пост {i}')
+        second = self.get_page(cursor=first.next_cursor)
+        third = self.get_page(cursor=second.next_cursor)
+        walked = [post.id for page in (first, second, third)
+                  for post in page]
+        self.assertEqual(len(walked), 25)
+        self.assertEqual(len(set(walked)), 25)
+        self.assertFalse(third.has_next())
+
+    def test_next_pages_are_not_ranked_again(self):
+        first = self.get_page()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(cursor=first.next_cursor)
+        self.assertFalse([query for query in queries
+                          if 'bm25' in query['sql']])
+
+    def test_expired_cursor_starts_over(self):
+        first = self.get_page()
+        cache.clear()
+        page = self.get_page(cursor=first.next_cursor)
+        self.assertEqual(list(page), list(first))
@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+from xml.etree import ElementTree
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import lookups
+from ..cache import cache
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@override_settings(SYNDICATION_FEED_SIZE=3)
+class SyndicationFeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='StasBasov', first_name='Стас', last_name='Басов')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы')
+        cls.posts = [
+            Post.objects.create(text=f'Пост <{i}> & ко', author=cls.user,
+                                group=cls.group if i % 2 else None)
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        lookups.clear()
+
+    def test_atom_feed_streams_newest_posts(self):
+        response = self.client.get(reverse('index_feed', args=['atom']))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'application/atom+xml; charset=utf-8')
+        root = ElementTree.fromstring(content(response))
+        entries = root.findall(f'{ATOM}entry')
+        self.assertEqual([entry.find(f'{ATOM}summary').text
+                          for entry in entries],
+                         [post.text for post in self.posts[:1:-1]])
+        self.assertEqual(entries[0].find(f'{ATOM}author/{ATOM}name').text,
+                         'Стас Басов')
+        self.assertTrue(entries[0].find(f'{ATOM}link').get('href')
+                        .endswith(f'/StasBasov/{self.posts[-1].id}/'))
+        self.assertEqual(root.find(f'{ATOM}updated').text[:19],
+                         self.posts[-1].pub_date.isoformat()[:19])
+
+    def test_group_rss_feed(self):
+        response = self.client.get(
+            reverse('group_feed', args=['test-slug', 'rss']))
+        self.assertEqual(response['Content-Type'],
+                         'application/rss+xml; charset=utf-8')
+        channel = ElementTree.fromstring(content(response)).find('channel')
+        self.assertEqual(channel.find('title').text,
+                         'Yatube: Тестовый заголовок')
+        items = channel.findall('item')
+        self.assertEqual([item.find('description').text for item in items],
+                         [self.posts[3].text, self.posts[1].text])
+        self.assertEqual(items[0].find('category').text,
+                         'Тестовый заголовок')
+
+    def test_unknown_feed_or_group(self):
+        self.assertEqual(self.client.get('/feeds/json/').status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('group_feed', args=['missing', 'rss'])).status_code, 404)
+
+    def test_author_named_feeds_keeps_post_pages(self):
+        author = User.objects.create_user(username='feeds')
+        post = Post.objects.create(text='Пост автора feeds', author=author)
+        url = reverse('posts', args=['feeds', post.id])
+        self.assertEqual(url, f'/feeds/{post.id}/')
+        self.assertContains(self.client.get(url), 'Пост автора feeds')
+        self.assertEqual(self.client.get(
+            reverse('profile', args=['feeds'])).status_code, 200)
+
+    def test_not_modified_until_post_changes(self):
+        url = reverse('index_feed', args=['atom'])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.posts[0].text = 'Правка'
+        self.posts[0].save()
+        self.assertEqual(self.client.get(
+            url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_feed_links_on_pages(self):
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, reverse('index_feed', args=['atom']))
+        response = self.client.get(reverse('group', args=['test-slug']))
+        self.assertContains(response,
+                            reverse('group_feed', args=['test-slug', 'rss']))
+
+
+class AuthorArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        for i in range(5):
+            Post.objects.create(text=f'Пост {i}, "в кавычках"',
+                                author=cls.user,
+                                group=cls.group if i % 2 else None)
+        Post.objects.create(
+            text='Чужой пост',
+            author=User.objects.create_user(username='other'))
+
+    def setUp(self):
+        lookups.clear()
+        self.url = reverse('author_archive', args=['StasBasov'])
+
+    def test_archive_streams_all_posts(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="StasBasov-posts.jsonl"')
+        rows = [json.loads(line) for line in content(response).splitlines()]
+        self.assertEqual([row['text'] for row in rows],
+                         [f'Пост {i}, "в кавычках"' for i in range(5)])
+        self.assertEqual(rows[1]['group'], 'test-slug')
+
+    def test_archive_as_csv(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(content(response))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['author'], 'StasBasov')
+        self.assertEqual(self.client.get(
+            self.url, {'format': 'xml'}).status_code, 404)
+
+    def test_archive_only_for_author(self):
+        response = self.client.get(self.url)
+        self.assertRedirects(response, f"{reverse('login')}?next={self.url}")
+        self.client.force_login(User.objects.get(username='other'))
+        response = self.client.get(self.url)
+        self.assertRedirects(response,
+                             reverse('profile', args=['StasBasov']))
+
+    def test_profile_links_archive_for_author(self):
+        profile = reverse('profile', args=['StasBasov'])
+        self.assertNotContains(self.client.get(profile), self.url)
+        self.client.force_login(self.user)
+        self.assertContains(self.client.get(profile), self.url)
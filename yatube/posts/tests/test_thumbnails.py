@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from tasks.models import Job
+from tasks.queue import claim, run_job
+
+from ..cache import cache
+from ..models import Post, User
+from ..thumbnails import post_image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='cat.png', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostThumbnailsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='StasBasov')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.profile_url = reverse('profile',
+                                   kwargs={'username': self.user.username})
+
+    def create_post(self, **kwargs):
+        self.authorized_client.post(reverse('new_post'), {
+            'text': 'Пост с картинкой', 'image': make_image(**kwargs)})
+        return Post.objects.latest('id')
+
+    def test_new_post_form_keeps_image_separately(self):
+        response = self.authorized_client.get(reverse('new_post'))
+        self.assertEqual(list(response.context['form'].fields),
+                         ['text', 'group'])
+        self.assertIn('image', response.context['image_form'].fields)
+
+    def test_thumbnails_are_not_generated_on_request(self):
+        post = self.create_post()
+        self.assertTrue(post.image)
+        response = self.client.get(self.profile_url)
+        self.assertNotContains(response, 'srcset')
+        self.assertIsNone(post_image(post))
+
+    def test_command_generates_srcset(self):
+        post = self.create_post()
+        self.client.get(self.profile_url)
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('Постов с новыми миниатюрами: 1', out.getvalue())
+        image = post_image(post)
+        self.assertEqual(image['width'], 960)
+        self.assertEqual(image['srcset'].count('w'), 3)
+        self.assertIn('320w', image['srcset'])
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, image['srcset'])
+
+    def test_new_image_enqueues_thumbnails_job(self):
+        post = self.create_post()
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'posts.jobs.generate_post_thumbnails')
+        self.client.get(self.profile_url)
+        for job_id in claim(10):
+            self.assertTrue(run_job(job_id))
+        self.assertFalse(Job.objects.exists())
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, post_image(post)['srcset'])
+
+    def test_edit_without_new_image_does_not_enqueue(self):
+        post = self.create_post()
+        Job.objects.all().delete()
+        post = Post.objects.get(id=post.id)
+        post.text = 'Другой текст'
+        post.save()
+        self.assertFalse(Job.objects.exists())
+
+    def test_command_does_not_load_authors_one_by_one(self):
+        for _ in range(3):
+            self.create_post()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('generate_thumbnails', stdout=StringIO())
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('SELECT')
+                          and 'FROM "auth_user"' in query['sql']])
+
+    def test_small_images_are_not_upscaled(self):
+        post = self.create_post(size=(400, 300))
+        call_command('generate_thumbnails', stdout=StringIO())
+        image = post_image(post)
+        self.assertEqual(image['width'], 400)
+        self.assertEqual(image['srcset'].count('w'), 2)
+
+    def test_second_run_has_nothing_to_do(self):
+        self.create_post()
+        call_command('generate_thumbnails', stdout=StringIO())
+        out = StringIO()
+        call_command('generate_thumbnails', stdout=out)
+        self.assertIn('Постов с новыми миниатюрами: 0', out.getvalue())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=100)
+    def test_large_upload_is_rejected(self):
+        response = self.authorized_client.post(reverse('new_post'), {
+            'text': 'Пост', 'image': make_image()})
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['image_form'].errors['image'])
@@ -9,9 +9,7 @@ from ..models import Group, Post, User
 class TaskURLTests(TestCase):
     User = get_user_model()
 
-    @classmethod
     def setUp(self):
-        super().setUpClass()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='AndreyG')
         self.user_2 = User.objects.create_user(username='TatianaK')
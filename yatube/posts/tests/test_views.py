@@ -1,8 +1,18 @@
+from http import HTTPStatus
+
 from django import forms
-from django.test import Client, TestCase
+from django.db import connection, transaction
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 
-from ..models import Group, Post, User
+from .. import lookups
+from ..cache import (cache, count_posts, feed_count, feed_count_key,
+                     group_feed_key, post_card_key)
+from ..models import AuthorStats, Group, Post, User
+from ..paginators import ELLIPSIS, FeedPaginator, KeysetPaginator
 
 
 class TaskPagesTests(TestCase):
@@ -186,6 +196,9 @@ class PaginatorViewsTest(TestCase):
 
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_index_first_page_contains_ten_records(self):
         response = self.client.get(reverse(self.home_page))
         # Проверка: количество постов на первой странице равно 10.
@@ -220,3 +233,494 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(reverse(self.profile, kwargs={
             'username': self.user.username}) + '?page=2')
         self.assertEqual(len(response.context.get('page')), 3)
+
+
+@override_settings(NUMBER_OF_POSTS_ON_PAGE=1, PAGINATOR_ON_EACH_SIDE=2,
+                   PAGINATOR_ON_ENDS=1)
+class ElidedPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        for i in range(20):
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_elided_page_range(self):
+        paginator = FeedPaginator(range(20), 1)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(
+                10, on_each_side=2, on_ends=1)),
+            [1, ELLIPSIS, 8, 9, 10, 11, 12, ELLIPSIS, 20])
+        self.assertEqual(
+            list(paginator.get_elided_page_range(
+                2, on_each_side=2, on_ends=1)),
+            [1, 2, 3, 4, ELLIPSIS, 20])
+        self.assertEqual(
+            list(FeedPaginator(range(5), 1).get_elided_page_range(3)),
+            [1, 2, 3, 4, 5])
+
+    def test_count_is_bounded_by_limit(self):
+        paginator = FeedPaginator(Post.objects.all(), 1, limit=5)
+        self.assertEqual(paginator.count, 6)
+        self.assertEqual(FeedPaginator(Post.objects.all(), 1,
+                                       count=3).count, 3)
+
+    def test_paginator_renders_window(self):
+        response = self.client.get(reverse('index'), {'page': 10})
+        self.assertEqual(response.context['page'].number, 10)
+        content = response.content.decode()
+        self.assertEqual(content.count(ELLIPSIS), 2)
+        for number in (1, 8, 9, 11, 12, 20):
+            self.assertIn(f'?page={number}"', content)
+        for number in (2, 7, 13, 19):
+            self.assertNotIn(f'?page={number}"', content)
+
+    def test_profile_count_is_bounded(self):
+        url = reverse('profile', kwargs={'username': self.user.username})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page': 20})
+        self.assertEqual(response.context['page'].number, 20)
+        counts = [query['sql'] for query in queries
+                  if 'COUNT(' in query['sql'].upper()]
+        self.assertEqual(len(counts), 1)
+        self.assertIn('LIMIT', counts[0].upper())
+
+    def test_profile_pages_ignore_stale_author_stats(self):
+        AuthorStats.objects.filter(author=self.user).update(posts_count=1)
+        url = reverse('profile', kwargs={'username': self.user.username})
+        response = self.client.get(url, {'page': 20})
+        self.assertEqual(response.context['page'].number, 20)
+        self.assertEqual(response.context['page'].paginator.count, 20)
+        self.assertEqual(response.context['number_of_posts'], 1)
+
+
+@override_settings(KEYSET_PAGINATION_THRESHOLD=10)
+class KeysetPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='StasBasov')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Тестовый пост номер - {i}',
+                author=cls.user,
+                group=cls.group,
+            )
+            for i in range(25)
+        ]
+        # Одинаковое время публикации: порядок задаёт id.
+        Post.objects.filter(id__in=[post.id for post in cls.posts[:5]]).update(
+            pub_date=cls.posts[0].pub_date)
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        """Проходит ленту по ссылкам «Следующая» и возвращает все страницы."""
+        pages = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            page = response.context['page']
+            pages.append(page)
+            if not page.has_next():
+                return pages
+            cursor = page.next_cursor
+
+    def test_large_feeds_use_keyset_paginator(self):
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                page = response.context['page']
+                self.assertIsInstance(page.paginator, KeysetPaginator)
+                self.assertContains(response, f'?cursor={page.next_cursor}')
+
+    def test_small_feed_keeps_page_numbers(self):
+        with self.settings(KEYSET_PAGINATION_THRESHOLD=100):
+            response = self.client.get(reverse('index'))
+        self.assertNotIsInstance(
+            response.context['page'].paginator, KeysetPaginator)
+        self.assertContains(response, '?page=2')
+
+    def test_cursor_walk_returns_every_post_once(self):
+        pages = self.walk(reverse('index'))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        walked = [post.id for page in pages for post in page]
+        expected = list(Post.objects.order_by(
+            '-pub_date', '-id').values_list('id', flat=True))
+        self.assertEqual(walked, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        pages = self.walk(reverse('index'))
+        response = self.client.get(
+            reverse('index'), {'cursor': pages[2].previous_cursor})
+        page = response.context['page']
+        self.assertEqual(list(page), list(pages[1]))
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_keyset_page_skips_count_query(self):
+        page = self.walk(reverse('index'))[1]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('index'), {'cursor': page.next_cursor})
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries))
+
+    def test_invalid_cursor_returns_first_page(self):
+        response = self.client.get(reverse('index'), {'cursor': 'garbage'})
+        self.assertEqual(len(response.context['page']), 10)
+        self.assertFalse(response.context['page'].has_previous())
+
+
+class FeedQueryCountTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы'
+        )
+        cls.users = [
+            User.objects.create_user(username=f'user_{i}') for i in range(4)
+        ]
+        cls.user = cls.users[0]
+        for i in range(30):
+            Post.objects.create(
+                text=f'Тестовый пост номер - {i}',
+                author=cls.users[i % len(cls.users)] if i % 3 else cls.user,
+                group=cls.group,
+            )
+
+    def count_queries(self, url, per_page):
+        cache.clear()
+        lookups.clear()
+        with self.settings(NUMBER_OF_POSTS_ON_PAGE=per_page):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        self.assertEqual(len(response.context['page']), per_page)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        """Функция проверяет, что авторы и группы постов не запрашиваются
+        отдельно для каждой строки ленты."""
+        urls = (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url, 2),
+                                 self.count_queries(url, 10))
+
+    def test_index_page_query_count(self):
+        cache.clear()
+        # Версия страницы, ограниченный COUNT и сами посты.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('index'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('index'), {'page': 2})
+
+
+class FeedCountShiftTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='StasBasov')
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=self.user)
+
+    def test_count_is_shifted_by_signals_after_commit(self):
+        self.assertEqual(feed_count('index', Post.objects.all()), 3)
+        with transaction.atomic():
+            post = Post.objects.create(text='Новый пост', author=self.user)
+            self.assertEqual(cache.get(feed_count_key('index')), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(feed_count('index', Post.objects.all()), 4)
+        post.delete()
+        Post.objects.first().save()
+        self.assertEqual(cache.get(feed_count_key('index')), 3)
+
+    def test_rolled_back_post_is_not_counted(self):
+        self.assertEqual(feed_count('index', Post.objects.all()), 3)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Post.objects.create(text='Откат', author=self.user)
+            raise RuntimeError
+        self.assertEqual(feed_count('index', Post.objects.all()), 3)
+
+    def test_feed_cached_before_commit_is_dropped_after_it(self):
+        group = Group.objects.create(title='Группа', slug='group')
+        with transaction.atomic():
+            Post.objects.create(text='Новый пост', author=self.user,
+                                group=group)
+            # Читатель, не видящий поста, кладёт ленту в кэш до коммита.
+            cache.set(group_feed_key(group.id), [])
+        self.assertIsNone(cache.get(group_feed_key(group.id)))
+
+
+class FeedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='StasBasov')
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_shift_without_cached_count(self):
+        Post.objects.create(text='Новый пост', author=self.user)
+        self.assertIsNone(cache.get(feed_count_key('index')))
+        self.assertEqual(feed_count('index', Post.objects.all()), 4)
+
+    @override_settings(KEYSET_PAGINATION_THRESHOLD=1)
+    def test_large_feed_uses_database_statistics(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE posts_post')
+        Post.objects.bulk_create(
+            Post(text=f'Импорт {i}', author=self.user) for i in range(3))
+        # Статистика собрана до импорта и отстаёт от таблицы.
+        self.assertEqual(Post.objects.estimated_count(), 3)
+        self.assertEqual(count_posts(Post.objects.all()), 3)
+        self.assertIsNone(self.user.posts.estimated_count())
+        self.assertEqual(count_posts(self.user.posts.all()), 6)
+
+    @override_settings(KEYSET_PAGINATION_THRESHOLD=1)
+    def test_large_feed_without_statistics_is_counted(self):
+        self.assertIsNone(Post.objects.estimated_count())
+        self.assertEqual(count_posts(Post.objects.all()), 3)
+
+    def test_index_uses_cached_count(self):
+        self.client.get(reverse('index'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('index'), {'page': 1})
+        self.assertFalse(any('COUNT(' in query['sql'].upper()
+                             for query in queries))
+
+
+class PostCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='StasBasov')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(author=self.user,
+                                        text='Тестовый текст поста')
+        self.profile_url = reverse(
+            'profile', kwargs={'username': self.user.username})
+
+    def test_card_is_served_from_cache(self):
+        self.client.get(self.profile_url)
+        Post.objects.filter(id=self.post.id).update(text='Обход кэша')
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, 'Тестовый текст поста')
+        self.assertNotContains(response, 'Обход кэша')
+
+    def test_edit_invalidates_card(self):
+        self.client.get(self.profile_url)
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username, 'post_id': self.post.id}),
+            data={'text': 'Измененный текст'})
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, 'Измененный текст')
+
+    def test_delete_invalidates_card(self):
+        self.client.get(self.profile_url)
+        self.post.delete()
+        self.assertIsNone(cache.get(post_card_key(self.post, False)))
+
+    def test_queryset_delete_does_not_load_authors(self):
+        for i in range(3):
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.filter(author=self.user).delete()
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('SELECT')
+                          and 'FROM "auth_user"' in query['sql']])
+
+    def test_username_change_invalidates_card(self):
+        self.client.get(self.profile_url)
+        self.user.username = 'StasNew'
+        self.user.save()
+        response = self.client.get(
+            reverse('profile', kwargs={'username': 'StasNew'}))
+        self.assertContains(response, '@StasNew')
+        self.assertNotContains(response, 'StasBasov')
+
+    def test_edit_button_is_shown_to_author_only(self):
+        edit_url = reverse('post_edit', kwargs={
+            'username': self.user.username, 'post_id': self.post.id})
+        self.assertNotContains(self.client.get(self.profile_url), edit_url)
+        self.assertContains(
+            self.authorized_client.get(self.profile_url), edit_url)
+        self.assertNotContains(self.client.get(self.profile_url), edit_url)
+
+
+class GroupFeedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='StasBasov')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.other = Group.objects.create(title='Другая', slug='other')
+        self.posts = [
+            Post.objects.create(author=self.user, group=self.group,
+                                text=f'Пост {i}')
+            for i in range(5)
+        ]
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.url = reverse('group', kwargs={'slug': self.group.slug})
+
+    def head(self, group):
+        state = cache.get(group_feed_key(group.id))
+        return state and [pk for timestamp, pk in state['head']]
+
+    def page_ids(self):
+        response = self.authorized_client.get(self.url)
+        return [post.id for post in response.context['page']]
+
+    def test_page_is_served_from_materialized_ids(self):
+        self.authorized_client.get(self.url)
+        newest_first = [post.id for post in reversed(self.posts)]
+        self.assertEqual(self.head(self.group), newest_first)
+        # Сессия, пользователь и один запрос постов по id: группа уже
+        # в кэше поиска, а число постов — в материализованной ленте.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.page_ids(), newest_first)
+
+    def test_new_and_deleted_posts_reset_ids(self):
+        self.authorized_client.get(self.url)
+        post = Post.objects.create(author=self.user, group=self.group,
+                                   text='Новый')
+        self.assertIsNone(self.head(self.group))
+        self.assertEqual(self.page_ids()[0], post.id)
+        self.assertEqual(self.head(self.group)[0], post.id)
+        self.posts[2].delete()
+        self.assertIsNone(self.head(self.group))
+        self.assertNotIn(self.posts[2].id, self.page_ids())
+        self.assertEqual(cache.get(group_feed_key(self.group.id))['count'],
+                         5)
+
+    def test_posts_outside_group_keep_ids(self):
+        self.authorized_client.get(self.url)
+        Post.objects.create(author=self.user, group=self.other, text='Пост')
+        Post.objects.create(author=self.user, text='Без группы')
+        self.assertEqual(self.head(self.group),
+                         [post.id for post in reversed(self.posts)])
+
+    def test_group_change_moves_post_between_feeds(self):
+        self.authorized_client.get(self.url)
+        other_url = reverse('group', kwargs={'slug': self.other.slug})
+        self.authorized_client.get(other_url)
+        post = self.posts[1]
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username, 'post_id': post.id}),
+            data={'text': post.text, 'group': self.other.id})
+        self.assertIsNone(self.head(self.group))
+        self.assertIsNone(self.head(self.other))
+        self.assertNotIn(post.id, self.page_ids())
+        self.authorized_client.get(other_url)
+        self.assertEqual(self.head(self.other), [post.id])
+
+    @override_settings(GROUP_FEED_SIZE=2, NUMBER_OF_POSTS_ON_PAGE=2)
+    def test_pages_beyond_materialized_ids_use_queryset(self):
+        response = self.authorized_client.get(self.url, {'page': 3})
+        self.assertEqual([post.id for post in response.context['page']],
+                         [self.posts[0].id])
+        self.assertEqual(response.context['page'].paginator.count, 5)
+
+
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='StasBasov')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание группы')
+        self.group_2 = Group.objects.create(
+            title='Тестовый заголовок 2',
+            slug='test-slug-2',
+            description='Тестовое описание группы 2')
+        self.post = Post.objects.create(author=self.user,
+                                        text='Тестовый текст поста',
+                                        group=self.group)
+        self.index_url = reverse('index')
+        self.group_url = reverse('group', kwargs={'slug': self.group.slug})
+        self.group_2_url = reverse(
+            'group', kwargs={'slug': self.group_2.slug})
+
+    def edit_post(self, **data):
+        self.authorized_client.post(
+            reverse('post_edit', kwargs={
+                'username': self.user.username, 'post_id': self.post.id}),
+            data=data)
+
+    def test_anonymous_page_is_served_from_cache(self):
+        for url in (self.index_url, self.group_url):
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertContains(response, self.post.text)
+
+    def test_authorized_page_is_not_cached(self):
+        self.authorized_client.get(self.index_url)
+        Post.objects.filter(id=self.post.id).update(text='Обход кэша')
+        response = self.authorized_client.get(self.index_url)
+        self.assertContains(response, 'Обход кэша')
+
+    def test_conditional_request_returns_not_modified(self):
+        response = self.client.get(self.index_url)
+        response = self.client.get(
+            self.index_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_if_modified_since_does_not_hide_edits(self):
+        response = self.client.get(self.index_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.edit_post(text='Измененный текст', group=self.group.id)
+        response = self.client.get(
+            self.index_url, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertContains(response, 'Измененный текст')
+
+    def test_new_post_invalidates_cached_pages(self):
+        self.client.get(self.index_url)
+        self.client.get(self.group_url)
+        self.authorized_client.post(reverse('new_post'), data={
+            'text': 'Новый пост', 'group': self.group.id})
+        for url in (self.index_url, self.group_url):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новый пост')
+
+    def test_edit_invalidates_old_and_new_group(self):
+        self.client.get(self.group_url)
+        self.client.get(self.group_2_url)
+        self.edit_post(text='Перенесенный пост', group=self.group_2.id)
+        self.assertNotContains(self.client.get(self.group_url),
+                               'Перенесенный пост')
+        self.assertContains(self.client.get(self.group_2_url),
+                            'Перенесенный пост')
+
+    def test_edit_changes_etag(self):
+        etag = self.client.get(self.index_url)['ETag']
+        self.edit_post(text='Измененный текст', group=self.group.id)
+        response = self.client.get(self.index_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Измененный текст')
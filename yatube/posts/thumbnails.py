@@ -0,0 +1,63 @@
+"""Миниатюры картинок постов.
+
+Миниатюры создаёт фоновая задача posts.jobs.generate_post_thumbnails
+(или manage.py generate_thumbnails для старых постов), а не запрос страницы:
+карточка поста показывает только уже готовые варианты из kvstore
+sorl-thumbnail и ничего не пересчитывает.
+"""
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+
+class PostThumbnailBackend(ThumbnailBackend):
+    def cached_thumbnail(self, file_, geometry_string, **options):
+        """Как get_thumbnail, но без генерации: возвращает миниатюру
+        из kvstore или None, если её ещё не создали."""
+        source = ImageFile(file_)
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+
+backend = PostThumbnailBackend()
+
+
+def generate_thumbnails(post):
+    """Создаёт недостающие миниатюры поста; True, если что-то создано."""
+    created = False
+    for width in settings.POST_IMAGE_WIDTHS:
+        if backend.cached_thumbnail(post.image, str(width)) is None:
+            backend.get_thumbnail(post.image, str(width))
+            created = True
+    return created
+
+
+def post_image(post):
+    """Готовые миниатюры поста для <img srcset> или None."""
+    if not post.image:
+        return None
+    thumbnails = {}
+    for width in settings.POST_IMAGE_WIDTHS:
+        thumbnail = backend.cached_thumbnail(post.image, str(width))
+        # Маленькая картинка не растягивается: варианты могут совпасть.
+        if thumbnail is not None:
+            thumbnails.setdefault(thumbnail.width, thumbnail)
+    if not thumbnails:
+        return None
+    ordered = [thumbnails[width] for width in sorted(thumbnails)]
+    return {
+        'src': ordered[0].url,
+        'srcset': ', '.join(f'{thumbnail.url} {thumbnail.width}w'
+                            for thumbnail in ordered),
+        'width': ordered[-1].width,
+        'height': ordered[-1].height,
+    }
@@ -1,12 +1,21 @@
-from django.urls import path
+from django.urls import path, register_converter
 
 from . import views
+from .converters import FeedKindConverter
+
+register_converter(FeedKindConverter, 'feed')
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feeds/<feed:kind>/', views.index_feed, name='index_feed'),
     path('group/<slug>/', views.group_posts, name='group'),
+    path('group/<slug>/feeds/<feed:kind>/', views.group_feed,
+         name='group_feed'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/archive/', views.author_archive,
+         name='author_archive'),
     path('<str:username>/<int:post_id>/', views.post_view, name='posts'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit, name='post_edit'),
@@ -1,46 +1,132 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
 
-from .forms import PostForm
-from .models import Group, Post, User
+from .cache import (GroupFeed, cache_anonymous_page, feed_count, feed_etag,
+                    feed_version, group_scope, index_scope,
+                    invalidate_post_card)
+from .forms import PostForm, PostImageForm
+from .lookups import get_group_or_404, get_user_or_404
+from .models import AuthorStats, Post
+from .paginators import get_page
+from .search import SearchPaginator
+from .syndication import FEEDS, feed_items
+from .transfer import FORMATS, export_rows, serialize_rows
 
+ARCHIVE_CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
 
+
+@cache_anonymous_page(index_scope)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    feed = Post.objects.feed()
+    page = get_page(request, feed, count=feed_count('index', feed))
     return render(request, 'misc/index.html', {'page': page, })
 
 
+@cache_anonymous_page(group_scope)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = get_group_or_404(slug)
+    page = get_page(request, GroupFeed(group))
     return render(request, 'posts/group.html', {
         'group': group, 'page': page,
     })
 
 
+def syndication_feed(request, kind, queryset, scope, newest, **channel):
+    """Atom или RSS со свежими постами queryset, записи пишутся по мере
+    чтения из базы. ETag — как у страниц лент, без Last-Modified."""
+    if kind not in FEEDS:
+        raise Http404
+    etag = feed_etag(f'{scope}:{kind}', feed_version(scope), newest)
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+    feed = FEEDS[kind](
+        link=request.build_absolute_uri(channel.pop('link')),
+        feed_url=request.build_absolute_uri(), language='ru',
+        updated=newest, **channel)
+    response = StreamingHttpResponse(
+        feed.stream(feed_items(request, queryset,
+                               settings.SYNDICATION_FEED_SIZE)),
+        content_type=feed.content_type)
+    response['ETag'] = etag
+    return response
+
+
+def index_feed(request, kind):
+    scope, newest = index_scope()
+    return syndication_feed(
+        request, kind, Post.objects.feed(), scope, newest,
+        title='Yatube', link=reverse('index'),
+        description='Последние обновления на сайте')
+
+
+def group_feed(request, slug, kind):
+    group = get_group_or_404(slug)
+    scope, newest = group_scope(slug)
+    return syndication_feed(
+        request, kind, group.posts.feed(), scope, newest,
+        title=f'Yatube: {group.title}',
+        link=reverse('group', kwargs={'slug': slug}),
+        description=group.description)
+
+
+def search(request):
+    query = request.GET.get('q', '')
+    group = author = None
+    if request.GET.get('group'):
+        group = get_group_or_404(request.GET['group'])
+    if request.GET.get('author'):
+        author = get_user_or_404(request.GET['author'])
+    paginator = SearchPaginator(query, settings.NUMBER_OF_POSTS_ON_PAGE,
+                                group=group, author=author)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/search.html', {
+        'query': query, 'group': group, 'author': author, 'page': page,
+    })
+
+
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    number_of_posts = Post.objects.filter(author_id=user.id).count()
-    paginator = Paginator(user.posts.all(), settings.NUMBER_OF_POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    user = get_user_or_404(username)
+    # Счётчик AuthorStats только для показа: после bulk_create он
+    # может отставать, а страницы считаются по самим постам.
+    number_of_posts = AuthorStats.objects.posts_count(user)
+    page = get_page(request, user.posts.feed())
     return render(request, 'misc/profile.html', {
         'number_of_posts': number_of_posts, 'page': page, 'author': user,
     })
 
 
+@login_required
+def author_archive(request, username):
+    """Все посты автора файлом JSONL или CSV (?format=csv). Строки
+    читаются из базы пачками и сразу уходят клиенту, так что память
+    не зависит от числа постов."""
+    author = get_user_or_404(username)
+    if request.user.pk != author.pk:
+        return redirect('profile', username=username)
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in FORMATS:
+        raise Http404
+    rows = export_rows(Post.objects.filter(author_id=author.id))
+    response = StreamingHttpResponse(serialize_rows(rows, fmt),
+                                     content_type=ARCHIVE_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = (
+        f'attachment; filename="{author.username}-posts.{fmt}"')
+    return response
+
+
 def post_view(request, username, post_id):
-    user = get_object_or_404(User, username=username)
-    number_of_posts = Post.objects.filter(author_id=user.id).count()
-    post = get_object_or_404(Post, id=post_id, author_id=user.id)
+    user = get_user_or_404(username)
+    number_of_posts = AuthorStats.objects.posts_count(user)
+    post = get_object_or_404(Post.objects.feed(), id=post_id,
+                             author_id=user.id)
     return render(request, 'posts/post.html', {
         'number_of_posts': number_of_posts, 'post': post, 'author': user,
     })
@@ -48,27 +134,32 @@ def post_view(request, username, post_id):
 
 @login_required
 def new_post(request):
-    form = PostForm()
-    if request.method == 'GET':
-        return render(request, 'posts/new.html', {'form': form, })
-    elif request.method == 'POST':
-        form = PostForm(request.POST)
-        if form.is_valid():
-            post: Post = form.save(False)
-            post.author = request.user
-            post.save()
-            return redirect('index')
-        return render(request, 'posts/new.html', {'form': form})
-    return render(request, 'posts/new.html', {'form': form, })
+    post = Post(author=request.user)
+    data = request.POST if request.method == 'POST' else None
+    form = PostForm(data, instance=post)
+    image_form = PostImageForm(data, request.FILES or None, instance=post)
+    if all([form.is_valid(), image_form.is_valid()]):
+        post.save()
+        return redirect('index')
+    return render(request, 'posts/new.html', {
+        'form': form, 'image_form': image_form,
+    })
 
 
 @login_required
 def post_edit(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
+    author = get_user_or_404(username)
+    post = get_object_or_404(Post.objects.feed(), pk=post_id,
+                             author_id=author.id)
     if request.user != post.author:
         return redirect('posts', username=username, post_id=post_id)
     form = PostForm(request.POST or None, instance=post)
-    if form.is_valid():
+    image_form = PostImageForm(request.POST or None, request.FILES or None,
+                               instance=post)
+    if all([form.is_valid(), image_form.is_valid()]):
+        invalidate_post_card(post)
         post.save()
         return redirect('posts', username=username, post_id=post_id)
-    return render(request, 'posts/new.html', {'form': form, 'post': post})
+    return render(request, 'posts/new.html', {
+        'form': form, 'image_form': image_form, 'post': post,
+    })
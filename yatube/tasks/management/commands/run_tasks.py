@@ -0,0 +1,82 @@
+import multiprocessing
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import claim, release_stale, run_job
+
+
+def process_pool(workers):
+    # spawn, а не fork: соединения с базой не переживают fork.
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup)
+
+
+POOLS = {
+    'thread': ThreadPoolExecutor,
+    'process': process_pool,
+}
+
+
+def execute(job_id):
+    close_old_connections()
+    try:
+        return run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pool', choices=POOLS, default='thread',
+                            help='Пул потоков или процессов.')
+        parser.add_argument('--concurrency', type=int,
+                            default=settings.TASKS_CONCURRENCY,
+                            help='Сколько задач выполнять одновременно.')
+        parser.add_argument('--once', action='store_true',
+                            help='Выйти, когда очередь опустеет.')
+
+    def release_stale(self):
+        released = release_stale()
+        if released:
+            self.stdout.write(f'Возвращено в очередь зависших: {released}')
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        done = failed = 0
+        running = set()
+        next_release = time.monotonic()
+        with POOLS[options['pool']](concurrency) as pool:
+            while True:
+                # Воркер может пропасть и пока этот работает: его задачи
+                # возвращаются в очередь не только при запуске.
+                if time.monotonic() >= next_release:
+                    self.release_stale()
+                    next_release = (time.monotonic()
+                                    + settings.TASKS_RELEASE_INTERVAL)
+                free = concurrency - len(running)
+                job_ids = claim(free) if free else []
+                running |= {pool.submit(execute, job_id)
+                            for job_id in job_ids}
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(settings.TASKS_POLL_INTERVAL)
+                    continue
+                finished, running = wait(
+                    running, timeout=settings.TASKS_POLL_INTERVAL,
+                    return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future.result():
+                        done += 1
+                    else:
+                        failed += 1
+        self.stdout.write(f'Выполнено задач: {done}, с ошибкой: {failed}')
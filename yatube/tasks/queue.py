@@ -0,0 +1,111 @@
+"""Очередь фоновых задач в базе данных.
+
+Задача — функция с декоратором @task в модуле jobs.py приложения.
+func.delay(...) записывает её в таблицу Job в той же транзакции, что и
+изменения, которые её породили: воркер (manage.py run_tasks) увидит
+задачу только после коммита, а при откате она исчезнет вместе с ними.
+С TASKS_EAGER задачи выполняются сразу после коммита в том же процессе.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, max_attempts=None):
+    """Регистрирует функцию как задачу и добавляет ей метод delay()."""
+    if func is None:
+        return lambda func: task(func, max_attempts=max_attempts)
+    name = f'{func.__module__}.{func.__qualname__}'
+    registry[name] = func
+
+    def delay(*args, **kwargs):
+        return enqueue(name, args, kwargs, max_attempts=max_attempts)
+
+    func.task_name = name
+    func.delay = delay
+    return func
+
+
+def enqueue(name, args=(), kwargs=None, max_attempts=None, run_at=None):
+    if name not in registry:
+        raise KeyError(f'Неизвестная задача {name}')
+    payload = json.dumps({'args': list(args), 'kwargs': kwargs or {}})
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: call(name, payload))
+        return None
+    return Job.objects.create(
+        name=name, payload=payload,
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+    )
+
+
+def call(name, payload):
+    data = json.loads(payload)
+    return registry[name](*data['args'], **data['kwargs'])
+
+
+def claim(limit):
+    """Забирает до limit готовых задач и возвращает их id.
+
+    SQLite не умеет SELECT ... FOR UPDATE SKIP LOCKED, поэтому задача
+    захватывается условным UPDATE: из нескольких воркеров его
+    выполнит только один.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.PENDING, run_at__lte=now,
+    ).order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+    claimed = []
+    for job_id in list(candidates):
+        if Job.objects.filter(id=job_id, status=Job.PENDING).update(
+                status=Job.RUNNING, locked_at=now,
+                attempts=F('attempts') + 1):
+            claimed.append(job_id)
+    return claimed
+
+
+def release_stale():
+    """Возвращает в очередь задачи, воркер которых пропал."""
+    deadline = timezone.now() - timedelta(
+        seconds=settings.TASKS_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=deadline,
+    ).update(status=Job.PENDING, locked_at=None)
+
+
+def run_job(job_id):
+    """Выполняет захваченную задачу. Успешная задача удаляется,
+    упавшая — откладывается с растущей паузой или помечается FAILED."""
+    job = Job.objects.filter(id=job_id, status=Job.RUNNING).first()
+    if job is None:
+        return False
+    try:
+        call(job.name, job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала (попытка %d)', job, job.attempts,
+                       exc_info=True)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, last_error=error, locked_at=None)
+        else:
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            Job.objects.filter(id=job.id).update(
+                status=Job.PENDING, last_error=error, locked_at=None,
+                run_at=timezone.now() + timedelta(seconds=delay))
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
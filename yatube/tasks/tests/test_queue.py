@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from ..models import Job
+from ..queue import claim, enqueue, release_stale, run_job, task
+
+calls = []
+
+
+@task
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise ValueError('Сломалось')
+
+
+@task
+def abandon(value):
+    # Задача remember(value), которую захватил и бросил другой воркер.
+    job = remember.delay(value)
+    Job.objects.filter(id=job.id).update(
+        status=Job.RUNNING, attempts=1,
+        locked_at=timezone.now() - timedelta(hours=1))
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_stores_job(self):
+        job = remember.delay('привет')
+        self.assertEqual(job.name, remember.task_name)
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(calls, [])
+
+    def test_unknown_task_is_rejected(self):
+        with self.assertRaises(KeyError):
+            enqueue('posts.jobs.nothing')
+
+    def test_run_job_deletes_done_job(self):
+        remember.delay(1)
+        job_ids = claim(10)
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+        self.assertEqual(claim(10), [])
+        self.assertTrue(run_job(job_ids[0]))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_jobs_wait_for_run_at(self):
+        enqueue(remember.task_name, [1],
+                run_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(claim(10), [])
+
+    @override_settings(TASKS_RETRY_DELAY=10)
+    def test_failed_job_is_retried_then_marked_failed(self):
+        explode.delay()
+        started = timezone.now()
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertFalse(run_job(claim(10)[0]))
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('Сломалось', job.last_error)
+        self.assertGreaterEqual(job.run_at, started + timedelta(seconds=10))
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            self.assertFalse(run_job(claim(10)[0]))
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(claim(10), [])
+
+    @override_settings(TASKS_LOCK_TIMEOUT=60)
+    def test_release_stale(self):
+        remember.delay(1)
+        remember.delay(2)
+        claim(10)
+        Job.objects.filter(id=Job.objects.first().id).update(
+            locked_at=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(release_stale(), 1)
+        self.assertEqual(len(claim(10)), 1)
+
+
+class RunTasksCommandTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_once_drains_queue(self):
+        with transaction.atomic():
+            for value in range(5):
+                remember.delay(value)
+        explode.delay()
+        out = StringIO()
+        # Тестовая база в памяти блокирует таблицы целиком, поэтому
+        # один поток; файл в режиме WAL выдерживает и несколько.
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            call_command('run_tasks', '--once', '--concurrency=1',
+                         stdout=out)
+        self.assertIn('Выполнено задач: 5, с ошибкой: 1', out.getvalue())
+        self.assertEqual(sorted(calls), list(range(5)))
+        self.assertEqual(Job.objects.get().status, Job.PENDING)
+
+    @override_settings(TASKS_RELEASE_INTERVAL=0, TASKS_LOCK_TIMEOUT=60)
+    def test_stale_jobs_are_released_while_running(self):
+        abandon.delay('брошенная')
+        out = StringIO()
+        call_command('run_tasks', '--once', '--concurrency=1', stdout=out)
+        self.assertIn('Возвращено в очередь зависших: 1', out.getvalue())
+        self.assertIn('Выполнено задач: 2, с ошибкой: 0', out.getvalue())
+        self.assertEqual(calls, ['брошенная'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_rolled_back_job_is_not_run(self):
+        try:
+            with transaction.atomic():
+                remember.delay('откат')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with transaction.atomic():
+            remember.delay('сразу')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Job.objects.exists())
@@ -1,10 +1,40 @@
+from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.urls import Resolver404, resolve, reverse
 
 User = get_user_model()
 
+# Адреса автора, которые не должны перекрываться другими маршрутами.
+USER_ROUTES = (
+    ('profile', {}),
+    ('posts', {'post_id': 1}),
+    ('post_edit', {'post_id': 1}),
+)
+
+
+def username_is_routable(username):
+    """Все страницы автора с таким именем доходят до своих views."""
+    for name, kwargs in USER_ROUTES:
+        path = reverse(name, kwargs={'username': username, **kwargs})
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return False
+        if match.url_name != name or match.namespace:
+            return False
+    return True
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if not username_is_routable(username):
+            raise forms.ValidationError(
+                'Это имя занято служебной страницей сайта.',
+                code='reserved')
+        return username
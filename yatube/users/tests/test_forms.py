@@ -0,0 +1,37 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ..forms import CreationForm
+
+
+class CreationFormTest(TestCase):
+    def form(self, username):
+        return CreationForm(data={
+            'username': username,
+            'password1': 'Xq7-secret-pass',
+            'password2': 'Xq7-secret-pass',
+        })
+
+    def test_route_names_are_reserved(self):
+        for username in ('search', 'new', 'admin', 'metrics'):
+            with self.subTest(username=username):
+                form = self.form(username)
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.errors.as_data()['username'][0].code,
+                                 'reserved')
+
+    def test_regular_names(self):
+        # feeds/ принимает только форматы лент, посты автора feeds видны.
+        for username in ('StasBasov', 'feeds'):
+            with self.subTest(username=username):
+                self.assertTrue(self.form(username).is_valid())
+
+    def test_signup_rejects_reserved_name(self):
+        response = self.client.post(reverse('signup'), {
+            'username': 'search',
+            'password1': 'Xq7-secret-pass',
+            'password2': 'Xq7-secret-pass',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response, 'form', 'username',
+                             'Это имя занято служебной страницей сайта.')
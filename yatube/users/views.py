@@ -1,3 +1,5 @@
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
@@ -8,3 +10,22 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('login')
     template_name = "users/signup.html"
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.object.email:
+            self.send_welcome_email(self.object)
+        return response
+
+    def send_welcome_email(self, user):
+        # Письмо уходит через EMAIL_BACKEND, то есть ставится в очередь.
+        context = {
+            'user': user,
+            'domain': self.request.get_host(),
+            'protocol': 'https' if self.request.is_secure() else 'http',
+        }
+        subject = render_to_string('users/signup_email_subject.txt',
+                                   context)
+        send_mail(''.join(subject.splitlines()),
+                  render_to_string('users/signup_email.txt', context),
+                  None, [user.email])
@@ -0,0 +1,76 @@
+"""Точка входа ASGI, например для uvicorn yatube.asgi:application.
+
+С Django 3.0+ используется его собственный обработчик. Django 2.2 не умеет
+асинхронные представления, поэтому здесь WSGI-приложение выполняется
+в пуле потоков, а ответ медленному клиенту отдаёт уже цикл событий:
+поток освобождается, как только страница собрана. Потоковые ответы
+(StreamingHttpResponse) не собираются в память, а уходят по частям.
+"""
+import os
+
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from yatube.template_cache import warm_up
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+
+class BufferedWsgiToAsgiInstance(WsgiToAsgiInstance):
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await super().__call__(scope, receive, send)
+
+    async def run_wsgi_app(self, body):
+        content = await sync_to_async(self.render)(body)
+        if content is None:
+            return
+        await self.send(self.response_start)
+        await self.send({'type': 'http.response.body', 'body': content})
+
+    def render(self, body):
+        """Тело ответа целиком или None, если ответ уже отправлен."""
+        environ = self.build_environ(self.scope, body)
+        response = self.wsgi_application(environ, self.start_response)
+        try:
+            if getattr(response, 'streaming', False):
+                self.stream(response)
+                return None
+            return b''.join(response)
+        finally:
+            # close() шлёт request_finished, а с ним Django закрывает
+            # устаревшие соединения с базой.
+            if hasattr(response, 'close'):
+                response.close()
+
+    def stream(self, response):
+        # Части читаются в том же потоке, что и запросы к базе за ними;
+        # поток занят до конца отправки, зато тело не копится в памяти.
+        self.sync_send(self.response_start)
+        for chunk in response:
+            if chunk:
+                self.sync_send({'type': 'http.response.body',
+                                'body': chunk, 'more_body': True})
+        self.sync_send({'type': 'http.response.body'})
+
+
+class BufferedWsgiToAsgi(WsgiToAsgi):
+    """Как WsgiToAsgi из asgiref, но ответ собирается в потоке целиком
+    и отправляется из цикла событий, не занимая поток на время отправки.
+    Потоковые ответы отправляются по частям по мере готовности."""
+
+    async def __call__(self, scope, receive, send):
+        await BufferedWsgiToAsgiInstance(self.wsgi_application)(
+            scope, receive, send)
+
+
+try:
+    from django.core.asgi import get_asgi_application
+except ImportError:
+    from django.core.wsgi import get_wsgi_application
+
+    application = BufferedWsgiToAsgi(get_wsgi_application())
+else:
+    application = get_asgi_application()
+
+warm_up()
@@ -0,0 +1,201 @@
+"""Статика для продакшена: бандлы, хэши в именах, сжатие и раздача.
+
+collectstatic с CompressedManifestStorage склеивает бандлы из
+STATIC_BUNDLES, даёт каждому файлу имя с хэшем содержимого и кладёт рядом
+сжатые копии .gz и .br. StaticFilesMiddleware отдаёт их до остальных
+middleware; файлы с хэшем в имени браузер кэширует навсегда (immutable).
+При DEBUG всё это выключено: статику отдаёт runserver из исходников.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:  # без brotli создаются и отдаются только .gz
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt', '.xml',
+                '.html', '.ico')
+# Порядок — предпочтение при выборе по Accept-Encoding.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+IMMUTABLE = 'public, max-age=31536000, immutable'
+SHORT_CACHE = 'public, max-age=60'
+
+CSS_COMMENT = re.compile(r'/\*(?!!).*?\*/', re.S)
+CSS_URL = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+SOURCE_MAP = re.compile(r'^\s*//# sourceMappingURL=.*$', re.M)
+
+
+def minify_css(content):
+    """Убирает комментарии (кроме лицензионных /*! */) и пустые строки."""
+    content = CSS_COMMENT.sub('', content)
+    return '\n'.join(line.strip() for line in content.splitlines()
+                     if line.strip())
+
+
+def rebase_css_urls(content, source, bundle):
+    """Пересчитывает относительные url() файла source от папки bundle."""
+    directory = posixpath.dirname(bundle) or '.'
+
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('data:', '#', '/')) or '//' in url:
+            return match.group(0)
+        path = posixpath.normpath(
+            posixpath.join(posixpath.dirname(source), url))
+        return f'url({quote}{posixpath.relpath(path, directory)}{quote})'
+
+    return CSS_URL.sub(rebase, content)
+
+
+def build_bundle(name, sources, open_file):
+    """Склеивает sources в один CSS- или JS-файл name."""
+    parts = []
+    for source in sources:
+        with open_file(source) as stream:
+            content = stream.read().decode('utf-8')
+        if name.endswith('.css'):
+            parts.append(minify_css(rebase_css_urls(content, source, name)))
+        else:
+            # Карты исходников относятся к отдельным файлам, не к бандлу.
+            parts.append(SOURCE_MAP.sub('', content).rstrip() + '\n;')
+    return '\n'.join(parts) + '\n'
+
+
+def compress_file(path):
+    """Создаёт рядом с path сжатые копии, если они меньше оригинала."""
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    variants = [('.gz', gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as stream:
+                stream.write(compressed)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    builds_bundles = True
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        paths = dict(paths)
+        for name, sources in settings.STATIC_BUNDLES.items():
+            missing = [source for source in sources
+                       if not self.exists(source)]
+            if missing:
+                raise ValueError(
+                    f"Бандл {name}: не найдены {', '.join(missing)}")
+            content = build_bundle(name, sources, self.open)
+            if self.exists(name):
+                self.delete(name)
+            self._save(name, ContentFile(content.encode('utf-8')))
+            paths[name] = (self, name)
+        processed = set()
+        for name, hashed_name, done in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(done, Exception):
+                processed.update((name, hashed_name))
+            yield name, hashed_name, done
+        for name in sorted(processed):
+            if name.endswith(COMPRESSIBLE):
+                compress_file(self.path(name))
+
+
+class StaticFile:
+    def __init__(self, path, immutable):
+        self.path = path
+        self.immutable = immutable
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.content_type = (mimetypes.guess_type(path)[0]
+                             or 'application/octet-stream')
+        self.variants = [(encoding, path + suffix)
+                         for encoding, suffix in ENCODINGS
+                         if os.path.exists(path + suffix)]
+
+    def choose(self, accept_encoding):
+        accepted = {token.split(';')[0].strip()
+                    for token in accept_encoding.split(',')}
+        for encoding, path in self.variants:
+            if encoding in accepted:
+                return encoding, path
+        return None, self.path
+
+    def response(self, request):
+        if not self.immutable and not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                self.mtime, self.size):
+            return HttpResponseNotModified()
+        encoding, path = self.choose(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=self.content_type)
+            response['Content-Length'] = os.path.getsize(path)
+        else:
+            response = FileResponse(open(path, 'rb'),
+                                    content_type=self.content_type)
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+        if self.variants:
+            response['Vary'] = 'Accept-Encoding'
+        response['Last-Modified'] = http_date(self.mtime)
+        response['Cache-Control'] = (IMMUTABLE if self.immutable
+                                     else SHORT_CACHE)
+        return response
+
+
+def scan_static_root(root, prefix, manifest_name):
+    """Файлы STATIC_ROOT по URL. Имена с хэшем берутся из манифеста."""
+    try:
+        with open(os.path.join(root, manifest_name),
+                  encoding='utf-8') as stream:
+            hashed = set(json.load(stream)['paths'].values())
+    except (OSError, ValueError, KeyError):
+        hashed = set()
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            files[prefix + relative] = StaticFile(path, relative in hashed)
+    return files
+
+
+class StaticFilesMiddleware:
+    """Отдаёт статику из STATIC_ROOT без сессий, базы и представлений.
+    Ставится первым в MIDDLEWARE; список файлов читается при старте
+    процесса, то есть после collectstatic воркеры перезапускаются."""
+
+    def __init__(self, get_response):
+        if (settings.DEBUG or not settings.STATIC_ROOT
+                or not settings.STATIC_URL.startswith('/')):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.files = scan_static_root(
+            settings.STATIC_ROOT, settings.STATIC_URL,
+            ManifestStaticFilesStorage.manifest_name)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            static_file = self.files.get(request.path)
+            if static_file is not None:
+                return static_file.response(request)
+        return self.get_response(request)
@@ -0,0 +1,207 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from django.core.cache.backends import filebased, locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+MISSING = object()
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша по пространствам имён."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._misses = Counter()
+
+    def record(self, namespace, hits=0, misses=0):
+        with self._lock:
+            self._hits[namespace] += hits
+            self._misses[namespace] += misses
+
+    def snapshot(self):
+        with self._lock:
+            namespaces = set(self._hits) | set(self._misses)
+            return {
+                namespace: {
+                    'hits': self._hits[namespace],
+                    'misses': self._misses[namespace],
+                }
+                for namespace in sorted(namespaces)
+            }
+
+    def reset(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+stats = CacheStats()
+
+
+def namespace(cache):
+    """Пространство имён кэша — его KEY_PREFIX из settings.CACHES."""
+    return cache.key_prefix or 'default'
+
+
+class InstrumentedCacheMixin:
+    """Считает попадания и промахи get() в stats; get_many() у этих
+    бэкендов построен на get()."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, MISSING, version=version)
+        if value is MISSING:
+            stats.record(namespace(self), misses=1)
+            return default
+        stats.record(namespace(self), hits=1)
+        return value
+
+
+class LocMemCache(InstrumentedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(InstrumentedCacheMixin, filebased.FileBasedCache):
+    pass
+
+
+class SQLiteCache(BaseCache):
+    """Кэш в файле SQLite, общий для всех процессов на одной машине.
+
+    LOCATION — путь к файлу базы. Каждый поток держит своё соединение;
+    WAL позволяет читать, пока другой процесс пишет.
+    """
+    cull_every = 1000
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._path, timeout=5,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expired(self, expires):
+        return expires is not None and expires <= time.time()
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection.execute(
+            f'SELECT key, value, expires FROM cache '
+            f'WHERE key IN ({placeholders})', list(keys)).fetchall()
+        found = {
+            keys[key]: pickle.loads(value)
+            for key, value, expires in rows if not self._expired(expires)
+        }
+        stats.record(namespace(self), hits=len(found),
+                     misses=len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (self._key(key, version),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            for key, value in data.items()
+        ]
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)', rows)
+        self._maybe_cull(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        connection = self._connection
+        connection.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?',
+            (key, time.time()))
+        cursor = connection.execute(
+            'INSERT OR IGNORE INTO cache (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self.get_backend_timeout(timeout)))
+        self._maybe_cull(1)
+        return cursor.rowcount == 1
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection.execute(
+            'UPDATE cache SET expires = ? '
+            'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), self._key(key, version),
+             time.time()))
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._connection.execute(
+                f'DELETE FROM cache WHERE key IN ({placeholders})', keys)
+
+    def has_key(self, key, version=None):
+        row = self._connection.execute(
+            'SELECT expires FROM cache WHERE key = ?',
+            (self._key(key, version),)).fetchone()
+        return row is not None and not self._expired(row[0])
+
+    def clear(self):
+        """Удаляет только записи этого кэша: файл делят кэши с разными
+        KEY_PREFIX."""
+        prefix = self.key_prefix.replace('\\', '\\\\').replace(
+            '%', '\\%').replace('_', '\\_')
+        self._connection.execute(
+            "DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'",
+            (f'{prefix}:%',))
+
+    def _maybe_cull(self, writes):
+        with self._lock:
+            self._writes += writes
+            if self._writes < self.cull_every:
+                return
+            self._writes = 0
+        connection = self._connection
+        connection.execute('DELETE FROM cache WHERE expires <= ?',
+                           (time.time(),))
+        count, = connection.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            connection.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache '
+                'ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,))
@@ -0,0 +1,277 @@
+"""Замеры запросов к сайту: SQL, шаблоны и общее время по представлениям.
+
+Гистограммы живут в памяти процесса и отдаются представлением metrics.
+Каждый воркер считает своё, поэтому данные сбрасываются при перезапуске.
+Кроме того, для каждого шаблона копится своё время и время вложенных
+в него ({% include %}, родитель по {% extends %}, render_to_string
+из тегов): так видно, какие включения обходятся дороже всего.
+"""
+import bisect
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+METRICS = {
+    'total_ms': TIME_BUCKETS,
+    'sql_ms': TIME_BUCKETS,
+    'template_ms': TIME_BUCKETS,
+    'queries': COUNT_BUCKETS,
+}
+
+_local = threading.local()
+
+
+class Histogram:
+    """Число наблюдений по корзинам «не больше границы», как в Prometheus;
+    последняя корзина — всё, что больше самой крупной границы."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def snapshot(self):
+        cumulative = itertools.accumulate(self.counts)
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+            'buckets': dict(zip(bounds, cumulative)),
+        }
+
+
+class TemplateStats:
+    """Время отрисовки одного шаблона: полное, собственное (без вложенных
+    шаблонов) и по каждому вложенному."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0
+        self.self_ms = 0
+        self.max_ms = 0
+        self.includes = defaultdict(lambda: [0, 0])
+
+    def observe(self, total_ms, self_ms):
+        self.count += 1
+        self.total_ms += total_ms
+        self.self_ms += self_ms
+        self.max_ms = max(self.max_ms, total_ms)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'self_ms': round(self.self_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3),
+            'max_ms': round(self.max_ms, 3),
+            'includes': [
+                {'template': name, 'count': count,
+                 'total_ms': round(total_ms, 3)}
+                for name, (count, total_ms) in sorted(
+                    self.includes.items(), key=lambda item: -item[1][1])
+            ],
+        }
+
+
+class Registry:
+    """Гистограммы по именам представлений, время шаблонов и самые
+    медленные запросы."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = defaultdict(lambda: {
+                name: Histogram(buckets)
+                for name, buckets in METRICS.items()
+            })
+            self._templates = defaultdict(TemplateStats)
+            self._slowest = []
+
+    def record(self, view, values, sample=None, keep=0, templates=()):
+        """Добавляет замеры запроса; sample с полным списком SQL
+        остаётся, если запрос входит в keep самых медленных.
+        templates — кортежи (шаблон, родитель, полное мс, своё мс)."""
+        with self._lock:
+            histograms = self._views[view]
+            for name, value in values.items():
+                histograms[name].observe(value)
+            for name, parent, total_ms, self_ms in templates:
+                self._templates[name].observe(total_ms, self_ms)
+                if parent is not None:
+                    include = self._templates[parent].includes[name]
+                    include[0] += 1
+                    include[1] += total_ms
+            if sample is None or keep <= 0:
+                return False
+            entry = (values['total_ms'], next(self._order), sample)
+            if len(self._slowest) < keep:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+            else:
+                return False
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'views': {
+                    view: {
+                        name: histogram.snapshot()
+                        for name, histogram in histograms.items()
+                    }
+                    for view, histograms in sorted(self._views.items())
+                },
+                'templates': {
+                    name: stats.snapshot()
+                    for name, stats in sorted(
+                        self._templates.items(),
+                        key=lambda item: -item[1].total_ms)
+                },
+                'slowest': [
+                    sample for total, order, sample
+                    in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+
+registry = Registry()
+
+
+def instrumented_render(render):
+    """Считает время шаблонов запроса. В template_ms идёт только внешний
+    шаблон: вложенные рендерятся внутри него. По каждому шаблону
+    записывается полное время и своё — за вычетом вложенных.
+
+    Блоки наследника отрисовываются внутри {% extends %}, поэтому их
+    время достаётся базовому шаблону."""
+
+    def _render(self, context):
+        state = getattr(_local, 'state', None)
+        if state is None:
+            return render(self, context)
+        stack = state['template_stack']
+        if stack and stack[-1][2] is self:
+            # Обёртка стоит дважды: кто-то сохранил её и обернул своей.
+            return render(self, context)
+        frame = [self.name or '<string>', 0, self]
+        stack.append(frame)
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            stack.pop()
+            if stack:
+                parent = stack[-1]
+                parent[1] += elapsed
+                parent = parent[0]
+            else:
+                state['template_ms'] += elapsed
+                parent = None
+            state['templates'].append(
+                (frame[0], parent, elapsed, elapsed - frame[1]))
+
+    _render.instrumented = True
+    return _render
+
+
+def instrument_templates():
+    """Оборачивает Template._render, если его обёртки там нет.
+
+    Метод подменяют и другие: setup_test_environment, pytest-django,
+    debug-toolbar — и делают это после импорта модуля. Поэтому обёртка
+    проверяется перед каждым запросом, а не ставится один раз."""
+    if not getattr(Template._render, 'instrumented', False):
+        Template._render = instrumented_render(Template._render)
+
+
+class MetricsMiddleware:
+    """Снимает метрики каждого запроса. Ставится первым в MIDDLEWARE,
+    чтобы общее время включало остальные middleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        instrument_templates()
+        keep = settings.METRICS_SLOWEST_REQUESTS
+        state = {
+            'queries': 0,
+            'sql_ms': 0,
+            'template_ms': 0,
+            'template_stack': [],
+            'templates': [],
+            'sql': [] if keep > 0 else None,
+        }
+        _local.state = state
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(self.execute))
+                response = self.get_response(request)
+        finally:
+            _local.state = None
+        total_ms = (time.perf_counter() - started) * 1000
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        values = {
+            'total_ms': total_ms,
+            'sql_ms': state['sql_ms'],
+            'template_ms': state['template_ms'],
+            'queries': state['queries'],
+        }
+        sample = None
+        if state['sql'] is not None:
+            sample = {
+                'view': view,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                **{name: round(value, 3) for name, value in values.items()},
+                'sql': state['sql'],
+            }
+        if registry.record(view, values, sample, keep, state['templates']):
+            logger.info('Медленный запрос %s %.1f мс, SQL: %d',
+                        sample['path'], total_ms, state['queries'],
+                        extra={'metrics': sample})
+        return response
+
+    def execute(self, execute, sql, params, many, context):
+        state = _local.state
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            state['queries'] += 1
+            state['sql_ms'] += duration
+            if state['sql'] is not None:
+                state['sql'].append(
+                    {'sql': sql, 'ms': round(duration, 3)})
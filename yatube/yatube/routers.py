@@ -0,0 +1,104 @@
+"""Чтение с реплик, запись в основную базу.
+
+Реплики задаются в settings.DATABASE_REPLICAS. Запросы к репликам
+идут только из безопасных (GET, HEAD) HTTP-запросов, которые отметил
+ReplicaMiddleware; команды manage.py, shell и запись работают с default.
+После записи клиент получает куку и какое-то время читает с основной
+базы, чтобы видеть свой пост, пока реплика его ещё не получила.
+Данные для общих кэшей читаются с основной базы (read_from_primary),
+поэтому кэш не зависит от того, насколько отстала реплика.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+# Сессия, не найденная на отставшей реплике, разлогинивает пользователя,
+# поэтому сессии и учётные записи всегда читаются с основной базы.
+PRIMARY_ONLY_APPS = {'sessions', 'auth'}
+
+_state = threading.local()
+
+
+@contextmanager
+def _replicas(allowed):
+    previous = getattr(_state, 'replicas', False)
+    _state.replicas = allowed
+    try:
+        yield
+    finally:
+        _state.replicas = previous
+
+
+def read_from_replicas():
+    """Разрешает чтение с реплик внутри блока в текущем потоке."""
+    return _replicas(True)
+
+
+def read_from_primary():
+    """Читает с основной базы внутри блока, даже в запросе с репликами.
+
+    Для данных, которые кладутся в общий кэш: прочитанное с отставшей
+    реплики пролежало бы там до следующей записи.
+    """
+    return _replicas(False)
+
+
+def replicas_allowed():
+    return getattr(_state, 'replicas', False)
+
+
+class ReplicaRouter:
+    """Выбирает реплику для чтения; в остальных случаях возвращает None,
+    и Django берёт базу из подсказок или default."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if settings.DATABASE_REPLICAS and replicas_allowed():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and \
+                instance._state.db in settings.DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Отправляет чтение безопасных запросов на реплики. После запроса
+    с записью ставит куку PRIMARY_PIN_COOKIE: пока она жива, клиент
+    читает с основной базы."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie = settings.PRIMARY_PIN_COOKIE
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and response.status_code < 400:
+                response.set_cookie(
+                    cookie, '1', max_age=settings.PRIMARY_PIN_SECONDS,
+                    httponly=True, samesite='Lax')
+            return response
+        if cookie in request.COOKIES:
+            return self.get_response(request)
+        with read_from_replicas():
+            return self.get_response(request)
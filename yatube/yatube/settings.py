@@ -18,6 +18,11 @@ INSTALLED_APPS = [
     'about',
     'users',
     'posts',
+    'benchmarks',
+    'tasks',
+    'mail',
+    'api',
+    'sorl.thumbnail',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -27,6 +32,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.assets.StaticFilesMiddleware',
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,12 +47,26 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+
+# Скомпилированные шаблоны живут в памяти процесса до его перезапуска
+# (деплоя), вместе с результатами поиска по DIRS, в том числе промахами.
+# Прогреваются при старте wsgi/asgi; YATUBE_TEMPLATE_CACHE=0 выключает
+# кэш на время правки шаблонов.
+TEMPLATE_CACHE = os.getenv('YATUBE_TEMPLATE_CACHE', '1') == '1'
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR, join(BASE_DIR, 'templates/users')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader',
+                 TEMPLATE_SOURCE_LOADERS),
+            ] if TEMPLATE_CACHE else TEMPLATE_SOURCE_LOADERS,
             'context_processors': [
                 'yatube.context_processors.year',
                 'django.template.context_processors.debug',
@@ -52,19 +74,77 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'assets': 'yatube.templatetags.assets',
+            },
         },
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': int(os.getenv('YATUBE_CONN_MAX_AGE', 60)),
+        'OPTIONS': {'pragmas': SQLITE_PRAGMAS},
     }
 }
 
+# Реплики — копии основной базы, которые обновляет manage.py sync_replica.
+# Пути к файлам перечисляются через запятую в YATUBE_DB_REPLICAS.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.getenv('YATUBE_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'yatube.sqlite',
+        'NAME': path,
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'OPTIONS': {'pragmas': {**SQLITE_PRAGMAS, 'query_only': 1}},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+PRIMARY_PIN_COOKIE = 'yatube_primary'
+PRIMARY_PIN_SECONDS = 10
+
+# Бэкенд, LOCATION по умолчанию и LOCATION кэша alias. У locmem и file
+# она у каждого кэша своя, иначе clear() одного стирает и остальные;
+# в файле SQLite кэши разделены KEY_PREFIX, и clear() удаляет только его.
+CACHE_BACKENDS = {
+    'locmem': ('yatube.cache.LocMemCache', 'yatube', '{location}-{alias}'),
+    'file': ('yatube.cache.FileBasedCache',
+             os.path.join(BASE_DIR, 'cache'),
+             os.path.join('{location}', '{alias}')),
+    'sqlite': ('yatube.cache.SQLiteCache',
+               os.path.join(BASE_DIR, 'cache.sqlite3'), '{location}'),
+}
+CACHE_BACKEND, CACHE_LOCATION, CACHE_ALIAS_LOCATION = CACHE_BACKENDS[
+    os.getenv('YATUBE_CACHE', 'locmem')]
+CACHES = {
+    alias: {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_ALIAS_LOCATION.format(
+            location=os.getenv('YATUBE_CACHE_LOCATION', CACHE_LOCATION),
+            alias=alias),
+        'KEY_PREFIX': alias,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+    for alias in ('default', 'posts')
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -97,11 +177,105 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static/img"),
 ]
 
+# Бандлы для тега {% bundle %}: collectstatic склеивает их исходники.
+STATIC_BUNDLES = {
+    'css/yatube.css': [
+        'bootstrap/dist/css/bootstrap.min.css',
+    ],
+    'js/yatube.js': [
+        'jquery/dist/jquery.min.js',
+        'bootstrap/dist/js/bootstrap.min.js',
+    ],
+}
+
+# Вне DEBUG статика собирается с хэшами и сжатием и отдаётся
+# yatube.assets.StaticFilesMiddleware.
+if not DEBUG:
+    STATICFILES_STORAGE = 'yatube.assets.CompressedManifestStorage'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+# Письма ставятся в очередь, а воркер (manage.py run_tasks) отправляет
+# их пачками через MAIL_DELIVERY_BACKEND: по умолчанию в файлы
+# sent_emails/, как раньше; с YATUBE_TASKS_EAGER=1 — сразу, без воркера.
+# SMTP включается через
+# YATUBE_MAIL_BACKEND=django.core.mail.backends.smtp.EmailBackend,
+# для разработки сервер поднимает manage.py smtp_sink.
+EMAIL_BACKEND = 'mail.backends.QueuedEmailBackend'
+
+MAIL_DELIVERY_BACKEND = os.getenv(
+    'YATUBE_MAIL_BACKEND', 'django.core.mail.backends.filebased.EmailBackend')
+
+MAIL_BATCH_SIZE = 100
+
+MAIL_FLUSH_DELAY = 1
+
+EMAIL_HOST = os.getenv('YATUBE_EMAIL_HOST', 'localhost')
+
+EMAIL_PORT = int(os.getenv('YATUBE_EMAIL_PORT', 1025))
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 NUMBER_OF_POSTS_ON_PAGE = 10
+
+KEYSET_PAGINATION_THRESHOLD = 1000
+
+# Сколько номеров страниц показывать вокруг текущей и по краям.
+PAGINATOR_ON_EACH_SIDE = 2
+PAGINATOR_ON_ENDS = 1
+
+# Число постов ленты сдвигают сигналы; таймаут ограничивает расхождение
+# после записей в обход них.
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Сколько свежих постов в лентах Atom и RSS.
+SYNDICATION_FEED_SIZE = 50
+
+# Постов на странице JSON API по умолчанию и наибольшее значение ?limit=.
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+FEED_PAGE_CACHE_TIMEOUT = 60 * 60
+
+GROUP_FEED_SIZE = 200
+
+GROUP_FEED_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Сколько результатов поиска ранжируется и сколько живёт их порядок,
+# по которому листаются следующие страницы.
+SEARCH_MAX_RESULTS = 1000
+SEARCH_RESULTS_CACHE_TIMEOUT = 30 * 60
+
+LOOKUP_CACHE_SIZE = 1024
+
+LOOKUP_CACHE_TTL = 5 * 60
+
+LOOKUP_CACHE_NEGATIVE_TTL = 30
+
+METRICS_SLOWEST_REQUESTS = int(os.getenv('YATUBE_METRICS_SLOWEST', 10))
+
+# Миниатюры картинок постов: ширины для srcset, перекодирование в JPEG.
+# Метаданные миниатюр sorl-thumbnail хранит в своём kvstore (БД + кэш).
+POST_IMAGE_WIDTHS = (320, 640, 960)
+POST_IMAGE_MAX_SIZE = 10 * 1024 * 1024
+THUMBNAIL_FORMAT = 'JPEG'
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_UPSCALE = False
+THUMBNAIL_PROGRESSIVE = True
+
+# Фоновые задачи (manage.py run_tasks). С TASKS_EAGER=1 задачи выполняются
+# сразу после коммита в процессе, который их поставил, без воркера.
+TASKS_EAGER = os.getenv('YATUBE_TASKS_EAGER', '') == '1'
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 10 * 60
+TASKS_POLL_INTERVAL = 1
+# Как часто run_tasks возвращает в очередь задачи пропавших воркеров.
+TASKS_RELEASE_INTERVAL = 60
+TASKS_CONCURRENCY = int(os.getenv('YATUBE_TASKS_CONCURRENCY', 4))
@@ -0,0 +1,30 @@
+"""Бэкенд SQLite, который настраивает каждое новое соединение.
+
+PRAGMA берутся из OPTIONS['pragmas'] в settings.DATABASES, остальные
+OPTIONS, как и раньше, уходят в sqlite3.connect().
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        for name, value in self.pragmas.items():
+            if not PRAGMA_NAME.match(name) or \
+                    not PRAGMA_VALUE.match(str(value)):
+                raise ImproperlyConfigured(
+                    f'Недопустимая PRAGMA: {name} = {value!r}')
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
@@ -0,0 +1,51 @@
+"""Прогрев кэша скомпилированных шаблонов.
+
+Шаблоны загружает django.template.loaders.cached.Loader: каждый шаблон
+читается с диска и компилируется один раз за жизнь процесса, поэтому
+новые шаблоны подхватываются только перезапуском воркеров при деплое.
+warm_up() компилирует все шаблоны заранее, при старте воркера, чтобы
+первые запросы не платили за разбор.
+"""
+import logging
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger(__name__)
+
+
+def template_names(loader):
+    """Имена всех шаблонов в папках загрузчиков внутри cached.Loader."""
+    names = []
+    for source_loader in loader.loaders:
+        for directory in source_loader.get_dirs():
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    names.append(os.path.relpath(path, directory).replace(
+                        os.sep, '/'))
+    return list(dict.fromkeys(names))
+
+
+def warm_up():
+    """Компилирует шаблоны всех движков с cached.Loader; возвращает,
+    сколько шаблонов теперь в кэше."""
+    warmed = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        engine = backend.engine
+        for loader in engine.template_loaders:
+            if not isinstance(loader, CachedLoader):
+                continue
+            for name in template_names(loader):
+                try:
+                    engine.get_template(name)
+                except (TemplateSyntaxError, UnicodeDecodeError):
+                    logger.warning('Шаблон %s не скомпилирован', name,
+                                   exc_info=True)
+                else:
+                    warmed += 1
+    return warmed
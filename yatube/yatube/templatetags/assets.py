@@ -0,0 +1,23 @@
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """Подключает бандл из STATIC_BUNDLES. Пока бандлы не собираются
+    (DEBUG), подключаются его исходные файлы по отдельности."""
+    if getattr(staticfiles_storage, 'builds_bundles', False):
+        sources = [name]
+    else:
+        sources = settings.STATIC_BUNDLES[name]
+    if name.endswith('.css'):
+        html = '<link rel="stylesheet" href="{}">'
+    else:
+        html = '<script src="{}"></script>'
+    return format_html_join('\n    ', html,
+                            ((static(source),) for source in sources))
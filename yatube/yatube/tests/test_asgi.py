@@ -0,0 +1,62 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from ..asgi import BufferedWsgiToAsgi
+
+
+def hello(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'Hello, ', environ['PATH_INFO'].encode()]
+
+
+class StreamingBody(list):
+    streaming = True
+
+
+def chunked(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return StreamingBody([b'Hello', b'', b', world'])
+
+
+class BufferedWsgiToAsgiTests(SimpleTestCase):
+    def request(self, application, path):
+        messages = []
+        scope = {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return messages
+
+    def test_response_is_sent_in_one_body_message(self):
+        start, body = self.request(BufferedWsgiToAsgi(hello), '/yatube/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/plain'), start['headers'])
+        self.assertEqual(body['body'], b'Hello, /yatube/')
+        self.assertFalse(body.get('more_body', False))
+
+    def test_streaming_response_is_sent_in_chunks(self):
+        start, *bodies = self.request(BufferedWsgiToAsgi(chunked), '/')
+        self.assertEqual(start['status'], 200)
+        self.assertEqual([(body.get('body', b''), body.get('more_body'))
+                          for body in bodies],
+                         [(b'Hello', True), (b', world', True), (b'', None)])
+
+    def test_application_serves_django_pages(self):
+        from ..asgi import application
+
+        start, body = self.request(application, '/about/author/')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(b'<html', body['body'])
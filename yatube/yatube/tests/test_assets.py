@@ -0,0 +1,183 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.utils.http import http_date
+
+from ..assets import (StaticFilesMiddleware, brotli, minify_css,
+                      rebase_css_urls)
+
+BUNDLES = {
+    'css/yatube.css': ['bootstrap/dist/css/bootstrap.min.css'],
+    'js/yatube.js': ['jquery/dist/jquery.min.js',
+                     'bootstrap/dist/js/bootstrap.min.js'],
+}
+SOURCES = {
+    'bootstrap/dist/css/bootstrap.min.css':
+        '/*! Bootstrap */\n/* сборка */\nbody {\n  color: red;\n}\n'
+        '@font-face { src: url("../fonts/icons.woff"); }\n'
+        + '.btn { padding: 1px; }\n' * 50,
+    'bootstrap/dist/fonts/icons.woff': 'woff',
+    'jquery/dist/jquery.min.js':
+        'var jQuery = 1;\n//# sourceMappingURL=jquery.min.map\n',
+    'bootstrap/dist/js/bootstrap.min.js':
+        'var bootstrap = jQuery;' + ' ' * 500,
+}
+
+
+def collect(root, sources):
+    for name, content in SOURCES.items():
+        path = os.path.join(sources, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+    call_command('collectstatic', interactive=False, verbosity=0,
+                 stdout=StringIO())
+    with open(os.path.join(root, 'staticfiles.json')) as stream:
+        return json.load(stream)['paths']
+
+
+class CSSTest(SimpleTestCase):
+    def test_minify_keeps_license_comments(self):
+        self.assertEqual(minify_css('/*! MIT */\n/* x */\na {\n  b: c;\n}'),
+                         '/*! MIT */\na {\nb: c;\n}')
+
+    def test_urls_are_rebased_to_bundle(self):
+        css = ('a { background: url(../img/a.png); } '
+               'b { background: url("data:image/png;base64,AA"); } '
+               'i { background: url(/abs.png); }')
+        rebased = rebase_css_urls(css, 'lib/dist/css/lib.css',
+                                  'css/yatube.css')
+        self.assertIn('url(../lib/dist/img/a.png)', rebased)
+        self.assertIn('url("data:image/png;base64,AA")', rebased)
+        self.assertIn('url(/abs.png)', rebased)
+
+
+class CollectedStaticMixin:
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.sources = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.addCleanup(shutil.rmtree, self.sources)
+        settings = override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.sources],
+            STATIC_BUNDLES=BUNDLES,
+            STATICFILES_FINDERS=[
+                'django.contrib.staticfiles.finders.FileSystemFinder'],
+            STATICFILES_STORAGE='yatube.assets.CompressedManifestStorage',
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.manifest = collect(self.root, self.sources)
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as stream:
+            return stream.read()
+
+
+class StaticPipelineTest(CollectedStaticMixin, SimpleTestCase):
+    def test_bundles_are_hashed_and_merged(self):
+        css = self.read(self.manifest['css/yatube.css']).decode()
+        self.assertIn('/*! Bootstrap */', css)
+        self.assertNotIn('сборка', css)
+        font = self.manifest['bootstrap/dist/fonts/icons.woff']
+        self.assertIn(f'url("../{font}")', css)
+        js = self.read(self.manifest['js/yatube.js']).decode()
+        self.assertLess(js.index('jQuery = 1'), js.index('bootstrap ='))
+        self.assertNotIn('sourceMappingURL', js)
+
+    def test_compressed_siblings(self):
+        name = self.manifest['css/yatube.css']
+        original = self.read(name)
+        self.assertEqual(gzip.decompress(self.read(name + '.gz')), original)
+        if brotli is not None:
+            self.assertEqual(brotli.decompress(self.read(name + '.br')),
+                             original)
+        self.assertFalse(os.path.exists(os.path.join(
+            self.root, self.manifest['bootstrap/dist/fonts/icons.woff']
+            + '.gz')))
+
+    def test_bundle_tag_links_hashed_bundle(self):
+        html = Template("{% load assets %}{% bundle 'js/yatube.js' %}"
+                        ).render(Context())
+        self.assertEqual(
+            html, f'<script src="/static/{self.manifest["js/yatube.js"]}">'
+                  f'</script>')
+
+    @override_settings(
+        STATICFILES_STORAGE='django.contrib.staticfiles.storage.'
+                            'StaticFilesStorage')
+    def test_bundle_tag_links_sources_without_bundles(self):
+        html = Template("{% load assets %}{% bundle 'js/yatube.js' %}"
+                        ).render(Context())
+        self.assertEqual(html.count('<script'), 2)
+        self.assertIn('/static/jquery/dist/jquery.min.js', html)
+
+
+class StaticFilesMiddlewareTest(CollectedStaticMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.settings(DEBUG=False):
+            self.middleware = StaticFilesMiddleware(
+                lambda request: HttpResponse('django'))
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        response = self.middleware(self.factory.get(path, **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        name = self.manifest['css/yatube.css']
+        response = self.get(f'/static/{name}',
+                            HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        encoding = 'br' if brotli is not None else 'gzip'
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertEqual(int(response['Content-Length']), len(
+            self.read(f'{name}.{"br" if brotli else "gz"}')))
+
+    def test_identity_without_accept_encoding(self):
+        name = self.manifest['css/yatube.css']
+        response = self.get(f'/static/{name}')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content),
+                         self.read(name))
+
+    def test_unhashed_name_is_revalidated(self):
+        response = self.get('/static/css/yatube.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        response = self.get('/static/css/yatube.css',
+                            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        response = self.get('/static/css/yatube.css',
+                            HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, 200)
+
+    def test_head_has_no_body(self):
+        request = self.factory.head('/static/css/yatube.css')
+        response = self.middleware(request)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(int(response['Content-Length']),
+                         len(self.read('css/yatube.css')))
+
+    def test_other_paths_go_to_django(self):
+        self.assertEqual(self.get('/static/missing.css').content, b'django')
+        self.assertEqual(self.get('/').content, b'django')
+
+    def test_not_used_in_debug(self):
+        with self.settings(DEBUG=True):
+            with self.assertRaises(MiddlewareNotUsed):
+                StaticFilesMiddleware(lambda request: None)
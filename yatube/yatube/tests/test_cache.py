@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from ..cache import LocMemCache, SQLiteCache, stats
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = self.make_cache('posts')
+
+    def make_cache(self, prefix):
+        return SQLiteCache(self.location, {'KEY_PREFIX': prefix})
+
+    def test_set_and_get(self):
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.cache.get('key'), {'value': [1, 2]})
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+
+    def test_cache_is_shared_between_instances(self):
+        """Функция проверяет, что воркеры видят записи друг друга."""
+        self.cache.set('key', 'value')
+        other_worker = self.make_cache('posts')
+        self.assertEqual(other_worker.get('key'), 'value')
+        other_worker.delete('key')
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_namespaces_do_not_clash(self):
+        self.cache.set('key', 'posts')
+        users = self.make_cache('users')
+        users.set('key', 'users')
+        self.assertEqual(self.cache.get('key'), 'posts')
+        self.assertEqual(users.get('key'), 'users')
+
+    def test_clear_keeps_other_namespaces(self):
+        self.cache.set('key', 'posts')
+        other = self.make_cache('post_')
+        other.set('key', 'other')
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(other.get('key'), 'other')
+
+    def test_expired_values_are_missing(self):
+        self.cache.set('key', 'value', timeout=0)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new value'))
+        self.assertEqual(self.cache.get('key'), 'new value')
+
+    def test_add_keeps_existing_value(self):
+        self.cache.set('key', 'value')
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_many(self):
+        self.cache.set_many({'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'x']),
+                         {'a': 1, 'b': 2})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'c': 3})
+
+    def test_touch_and_clear(self):
+        self.cache.set('key', 'value', timeout=1)
+        self.assertTrue(self.cache.touch('key', timeout=None))
+        self.assertFalse(self.cache.touch('missing'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_cull_drops_expiring_entries_first(self):
+        cache = SQLiteCache(self.location, {
+            'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}})
+        cache.cull_every = 20
+        cache.set('forever', 'value', timeout=None)
+        for i in range(19):
+            cache.set(f'key-{i}', i, timeout=time.time() % 60 + 60)
+        self.assertTrue(cache.has_key('forever'))
+        self.assertLessEqual(
+            len(cache.get_many([f'key-{i}' for i in range(19)])), 10)
+
+
+class CacheAliasesTests(SimpleTestCase):
+    def test_clearing_one_alias_keeps_others(self):
+        caches['default'].set('key', 'default')
+        self.addCleanup(caches['default'].delete, 'key')
+        caches['posts'].set('key', 'posts')
+        caches['posts'].clear()
+        self.assertEqual(caches['default'].get('key'), 'default')
+
+
+class CacheStatsTests(SimpleTestCase):
+    def setUp(self):
+        stats.reset()
+
+    def test_hits_and_misses_are_counted_per_namespace(self):
+        cache = LocMemCache('stats-test', {'KEY_PREFIX': 'about'})
+        cache.set('key', 'value')
+        cache.get('key')
+        cache.get('missing')
+        cache.get_many(['key', 'missing'])
+        self.assertEqual(stats.snapshot(),
+                         {'about': {'hits': 2, 'misses': 2}})
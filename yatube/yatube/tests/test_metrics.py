@@ -0,0 +1,118 @@
+from django.template.base import Template
+from django.test import TestCase, override_settings
+from django.test.utils import instrumented_test_render
+from django.urls import reverse
+
+from posts.cache import cache as post_cache
+from posts.models import Post, User
+
+from ..metrics import COUNT_BUCKETS, Histogram, registry
+
+
+class HistogramTests(TestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram(COUNT_BUCKETS)
+        for value in (0, 1, 3, 500):
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot['count'], 4)
+        self.assertEqual(snapshot['max'], 500)
+        self.assertEqual(snapshot['buckets']['0'], 1)
+        self.assertEqual(snapshot['buckets']['5'], 3)
+        self.assertEqual(snapshot['buckets']['200'], 3)
+        self.assertEqual(snapshot['buckets']['+Inf'], 4)
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='StasBasov')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        self.client.force_login(self.user)
+
+    def test_views_are_recorded_by_name(self):
+        self.client.get(reverse('profile', kwargs={'username': 'StasBasov'}))
+        self.client.get(reverse('posts', kwargs={
+            'username': 'StasBasov', 'post_id': self.post.id}))
+        views = registry.snapshot()['views']
+        self.assertIn('profile', views)
+        self.assertIn('posts', views)
+        profile = views['profile']
+        self.assertEqual(profile['total_ms']['count'], 1)
+        self.assertGreater(profile['queries']['sum'], 0)
+        self.assertGreater(profile['template_ms']['sum'], 0)
+        self.assertLessEqual(profile['template_ms']['sum'],
+                             profile['total_ms']['sum'])
+
+    def test_templates_report_includes(self):
+        post_cache.clear()
+        self.client.get(reverse('profile', kwargs={'username': 'StasBasov'}))
+        templates = registry.snapshot()['templates']
+        base = templates['misc/base.html']
+        self.assertEqual(base['count'], 1)
+        self.assertLessEqual(base['self_ms'], base['total_ms'])
+        includes = {include['template']: include
+                    for include in base['includes']}
+        self.assertIn('misc/nav.html', includes)
+        self.assertEqual(includes['misc/post_card.html']['count'], 1)
+        self.assertEqual(templates['misc/profile.html']['includes'][0][
+            'template'], 'misc/base.html')
+        self.assertEqual(templates['misc/nav.html']['includes'], [])
+
+    def replace_render(self, render):
+        self.addCleanup(setattr, Template, '_render', Template._render)
+        Template._render = render
+
+    def test_render_replaced_after_import_is_measured(self):
+        # Так Template._render подменяет setup_test_environment.
+        self.replace_render(instrumented_test_render)
+        self.client.get(reverse('profile', kwargs={'username': 'StasBasov'}))
+        snapshot = registry.snapshot()
+        self.assertGreater(
+            snapshot['views']['profile']['template_ms']['sum'], 0)
+        self.assertIn('misc/base.html', snapshot['templates'])
+
+    def test_wrapped_wrapper_is_measured_once(self):
+        render = Template._render
+
+        def _render(self, context):
+            return render(self, context)
+
+        self.replace_render(_render)
+        self.client.get(reverse('profile', kwargs={'username': 'StasBasov'}))
+        templates = registry.snapshot()['templates']
+        self.assertEqual(templates['misc/base.html']['count'], 1)
+        self.assertEqual(templates['misc/profile.html']['count'], 1)
+
+    @override_settings(METRICS_SLOWEST_REQUESTS=2)
+    def test_slowest_requests_keep_query_lists(self):
+        for _ in range(4):
+            self.client.get(reverse('index'))
+        slowest = registry.snapshot()['slowest']
+        self.assertEqual(len(slowest), 2)
+        self.assertGreaterEqual(slowest[0]['total_ms'],
+                                slowest[1]['total_ms'])
+        self.assertEqual(len(slowest[0]['sql']), slowest[0]['queries'])
+
+    @override_settings(METRICS_SLOWEST_REQUESTS=0)
+    def test_sampling_can_be_disabled(self):
+        self.client.get(reverse('index'))
+        self.assertEqual(registry.snapshot()['slowest'], [])
+
+
+class MetricsViewTests(TestCase):
+    def test_metrics_are_for_staff_only(self):
+        user = User.objects.create_user(username='reader')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code,
+                         404)
+
+    def test_metrics_dump(self):
+        registry.reset()
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        self.client.force_login(admin)
+        self.client.get(reverse('index'))
+        data = self.client.get(reverse('metrics')).json()
+        self.assertIn('index', data['views'])
+        self.assertIn('cache', data)
+        self.assertIn('slowest', data)
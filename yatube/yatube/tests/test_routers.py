@@ -0,0 +1,105 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts import lookups
+from posts.cache import cache, cache_anonymous_page
+from posts.models import Post, User
+
+from ..routers import ReplicaMiddleware, read_from_primary, read_from_replicas
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_stay_on_primary_outside_requests(self):
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_reads_go_to_replica_when_allowed(self):
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Post), 'replica')
+            self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_objects_read_from_replica_are_saved_to_primary(self):
+        post = Post(text='Пост')
+        post._state.db = 'replica'
+        self.assertEqual(router.db_for_write(Post, instance=post), 'default')
+
+    def test_sessions_and_users_are_read_from_primary(self):
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Session), 'default')
+            self.assertEqual(router.db_for_read(User), 'default')
+
+    def test_primary_block_inside_replica_block(self):
+        with read_from_replicas():
+            with read_from_primary():
+                self.assertEqual(router.db_for_read(Post), 'default')
+            self.assertEqual(router.db_for_read(Post), 'replica')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.used = []
+        self.middleware = ReplicaMiddleware(self.view)
+
+    def view(self, request):
+        self.used.append(router.db_for_read(Post))
+        return HttpResponse()
+
+    def test_safe_requests_read_from_replica(self):
+        self.middleware(self.factory.get('/'))
+        self.assertEqual(self.used, ['replica'])
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_write_pins_client_to_primary(self):
+        response = self.middleware(self.factory.post('/new/'))
+        self.assertEqual(self.used, ['default'])
+        self.assertIn('yatube_primary', response.cookies)
+        request = self.factory.get('/')
+        request.COOKIES['yatube_primary'] = '1'
+        self.middleware(request)
+        self.assertEqual(self.used, ['default', 'default'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_cookie_without_replicas(self):
+        response = self.middleware(self.factory.post('/new/'))
+        self.assertNotIn('yatube_primary', response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class CacheFillTests(SimpleTestCase):
+    """То, что попадает в общий кэш, читается с основной базы."""
+
+    def setUp(self):
+        cache.clear()
+        lookups.clear()
+        self.used = []
+
+    def view(self, request):
+        self.used.append(router.db_for_read(Post))
+        return HttpResponse()
+
+    def test_anonymous_page_is_rendered_from_primary(self):
+        view = cache_anonymous_page(lambda: ('test', None))(self.view)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with read_from_replicas():
+            view(request)
+            view(request)
+        self.assertEqual(self.used, ['default'])
+
+    def test_lookup_is_loaded_from_primary(self):
+        def load():
+            self.used.append(router.db_for_read(Post))
+            return None
+
+        with read_from_replicas(), self.assertRaises(Http404):
+            lookups.lookup(lookups.groups, 'missing', load)
+        self.assertEqual(self.used, ['default'])
@@ -0,0 +1,30 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ..sqlite.base import DatabaseWrapper
+
+
+class SQLitePragmasTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_on_connect(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        self.assertEqual(self.pragma('busy_timeout'),
+                         pragmas['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), pragmas['cache_size'])
+        self.assertEqual(self.pragma('synchronous'), 1)
+
+
+class SQLitePragmaValidationTests(SimpleTestCase):
+    def test_unsafe_pragma_is_rejected(self):
+        wrapper = DatabaseWrapper({
+            'NAME': ':memory:',
+            'OPTIONS': {'pragmas': {'cache_size': '1; DROP TABLE x'}},
+        })
+        wrapper.settings_dict.setdefault('TIME_ZONE', None)
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.get_connection_params()
@@ -0,0 +1,23 @@
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import SimpleTestCase
+
+from ..template_cache import warm_up
+
+
+class TemplateCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.loader = engines['django'].engine.template_loaders[0]
+        self.loader.reset()
+        self.addCleanup(self.loader.reset)
+
+    def test_loaders_are_cached(self):
+        self.assertIsInstance(self.loader, CachedLoader)
+
+    def test_warm_up_compiles_project_templates(self):
+        self.assertGreater(warm_up(), 0)
+        cached = self.loader.get_template_cache
+        for name in ('misc/base.html', 'misc/nav.html',
+                     'misc/paginator.html', 'misc/post_card.html',
+                     'registration/login.html'):
+            self.assertIn(name, cached)
@@ -0,0 +1,24 @@
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import never_cache
+
+from mail import delivery
+from mail.models import QueuedEmail
+
+from . import cache, metrics as request_metrics
+
+
+@never_cache
+def metrics(request):
+    """Метрики этого процесса: время и SQL по представлениям, самые
+    медленные запросы, попадания в кэш и отправка почты. Очередь писем
+    общая, остальное — только этого процесса. Только для персонала."""
+    if not request.user.is_staff:
+        raise Http404
+    queue = dict(QueuedEmail.objects.values_list('status').annotate(
+        count=Count('id')).order_by())
+    return JsonResponse({
+        **request_metrics.registry.snapshot(),
+        'cache': cache.stats.snapshot(),
+        'mail': {**delivery.stats.snapshot(), 'queue': queue},
+    }, json_dumps_params={'ensure_ascii': False})